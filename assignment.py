@@ -0,0 +1,139 @@
+from typing import List, Tuple, Set
+from collections import deque
+import argparse
+from cache import load_instance
+from common import Instance, Library, transform_result, save_atomic, load_result
+
+
+def capacities(instance: Instance, order: List[int]) -> List[int]:
+    """
+    number of books every library of order is able to scan when all of them are signed up one after another
+    """
+    start = 0
+    result = []
+    for i in order:
+        start += instance.signup[i]
+        result.append(max(0, instance.days - start) * instance.per_day[i])
+    return result
+
+
+def assign_books(instance: Instance, order: List[int]) -> List[List[int]]:
+    """
+    Optimal assignment of books to libraries signed up in fixed order.
+    Sets of books which can be scanned together form a transversal matroid, so taking books by score desc
+    and keeping every book for which an augmenting path exists is optimal.
+    Augmenting path moves already assigned books between libraries until some library has free capacity.
+    Libraries visited by failed search are full and closed for good (dead), they are never searched again.
+    :param order: library indices in signup order
+    :return: books assigned to every library of order
+    """
+    position = {it: pos for pos, it in enumerate(order)}
+    free = capacities(instance, order)
+    assigned: List[Set[int]] = [set() for _ in order]
+    dead = bytearray(len(order))
+    holders = {}
+
+    def libraries_of(book: int) -> List[int]:
+        if book not in holders:
+            holders[book] = [position[it] for it in instance.book_holders(book) if it in position]
+        return holders[book]
+
+    candidates = set()
+    for it in order:
+        candidates.update(instance.library_books(it))
+    remaining = sum(free)
+    for book in sorted(candidates, key=instance.scoring.__getitem__, reverse=True):
+        if not remaining or instance.scoring[book] <= 0:
+            break
+        parent = {}
+        queue = deque()
+        target = -1
+        for pos in libraries_of(book):
+            if dead[pos] or pos in parent:
+                continue
+            parent[pos] = (-1, book)
+            if free[pos]:
+                target = pos
+                break
+            queue.append(pos)
+        while target < 0 and queue:
+            pos = queue.popleft()
+            for moved in assigned[pos]:
+                for nxt in libraries_of(moved):
+                    if dead[nxt] or nxt in parent:
+                        continue
+                    parent[nxt] = (pos, moved)
+                    if free[nxt]:
+                        target = nxt
+                        break
+                    queue.append(nxt)
+                if target >= 0:
+                    break
+        if target < 0:
+            for pos in parent:
+                dead[pos] = 1
+            continue
+        free[target] -= 1
+        remaining -= 1
+        pos = target
+        while pos >= 0:
+            prev, moved = parent[pos]
+            if prev >= 0:
+                assigned[prev].remove(moved)
+            assigned[pos].add(moved)
+            pos = prev
+    key = instance.scoring.__getitem__
+    return [sorted(books, key=key, reverse=True) for books in assigned]
+
+
+def optimize(instance: Instance, libraries: List[Tuple[int, Library]]) -> List[Tuple[int, List[int]]]:
+    """
+    Reassign books of solution optimally, libraries signed up by greedy scanning keep their order,
+    libraries left without books are dropped (later libraries only gain days) and assignment is repeated
+    :return: result ready for save_result
+    """
+    order = [it for it, _ in transform_result(libraries, instance.days)]
+    while True:
+        books = assign_books(instance, order)
+        kept = [it for it, b in zip(order, books) if b]
+        if len(kept) == len(order):
+            return list(zip(order, books))
+        order = kept
+
+
+def result_score(instance: Instance, result: List[Tuple[int, List[int]]]) -> int:
+    scanned = set()
+    for _, books in result:
+        scanned.update(books)
+    return sum(map(instance.scoring.__getitem__, scanned))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Optimal reassignment of books for library order of saved result")
+    parser.add_argument('instance', type=str, choices=['a', 'b', 'c', 'd', 'e', 'f'],
+        help='Select instance to compute')
+    parser.add_argument('result', type=str,
+        help='Result file of any solver, only order of libraries is used')
+    parser.add_argument('-o', '--output', type=str, default=None,
+        help='Output file (output/<instance>_assigned.out by default)')
+    args = parser.parse_args()
+
+    index = ord(args.instance) - ord('a')
+
+    files = ['a_example.txt',
+             'b_read_on.txt',
+             'c_incunabula.txt',
+             'd_tough_choices.txt',
+             'e_so_many_books.txt',
+             'f_libraries_of_the_world.txt']
+    file = files[index]
+    print(file)
+
+    i = load_instance('input/' + file)
+    loaded = load_result(args.result)
+    print(result_score(i, loaded))
+    print('--------')
+    r = optimize(i, [i.libraries[it] for it, _ in loaded])
+    print(result_score(i, r))
+    save_atomic(r, args.output or 'output/' + file[0] + '_assigned.out')
+    print('Result saved. Done.')
@@ -0,0 +1,90 @@
+from typing import Callable, Dict, Any, Tuple
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import tracemalloc
+import argparse
+import json
+import os
+from common import Instance, score, transform_result
+from generator import SHAPES, generate
+from genetic import set_instance, initial_population, breed, tournament
+from main import basic
+
+
+def measure(fn: Callable[[], Any], memory: bool = True) -> Tuple[Any, Dict[str, float]]:
+    """
+    run fn once for time and once more under tracemalloc for peak memory
+    """
+    start = perf_counter()
+    result = fn()
+    stats = {'seconds': perf_counter() - start}
+    if memory:
+        tracemalloc.start()
+        fn()
+        stats['peak_mb'] = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return result, stats
+
+
+def benchmark(filename: str, size: int = 16, mutations: int = 5, k: int = 4, memory: bool = True) -> Dict[str, Any]:
+    """
+    time hot paths on single instance
+    """
+    report = {}
+    instance, report['parse'] = measure(lambda: Instance(filename), memory)
+    instance.libraries  # views are built lazily, do not count them into scoring
+    total_books = len(instance.books)
+    report['parse']['books_per_second'] = total_books / report['parse']['seconds']
+    report['instance'] = {'books': instance.num_books, 'libraries': instance.num_libraries, 'days': instance.days,
+                          'library_books': total_books}
+
+    _, report['score'] = measure(lambda: score(instance.libraries, instance.days, verbose=False), memory)
+    report['score']['libraries_per_second'] = instance.num_libraries / report['score']['seconds']
+
+    result, report['basic'] = measure(lambda: basic(instance), memory)
+    report['basic']['score'] = score(result, instance.days, verbose=False)
+
+    _, report['transform_result'] = measure(lambda: transform_result(result, instance.days), memory)
+
+    if instance.num_libraries < 3:  # crossover needs at least two libraries above split
+        return report
+
+    set_instance(instance)
+    population, report['ga_setup'] = measure(lambda: initial_population(size), memory)
+
+    def generation():
+        return breed([(tournament(population, k), tournament(population, k)) for _ in range(size // 2)], mutations)
+
+    _, report['ga_generation'] = measure(generation, memory)
+    report['ga_generation']['chromosomes_per_second'] = size / report['ga_generation']['seconds']
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark hot paths on synthetic instances")
+    parser.add_argument('-i', '--instances', type=str, nargs='+', choices=sorted(SHAPES),
+        help='Shapes of instances to benchmark (all by default)')
+    parser.add_argument('-s', '--scale', type=float, default=0.1,
+        help='Scale of synthetic instances')
+    parser.add_argument('--seed', type=int, default=0,
+        help='Random seed of generator')
+    parser.add_argument('-p', '--population', type=int, default=16,
+        help='Population size of GA generation')
+    parser.add_argument('--no-memory', action='store_true',
+        help='Do not measure peak memory (halves running time)')
+    parser.add_argument('-o', '--output', type=str, default='benchmark.json',
+        help='JSON report file')
+    args = parser.parse_args()
+
+    reports = {'scale': args.scale, 'seed': args.seed, 'instances': {}}
+    with TemporaryDirectory() as directory:
+        for kind in args.instances or sorted(SHAPES):
+            filename = os.path.join(directory, kind + '.txt')
+            generate(filename, kind, args.scale, args.seed)
+            reports['instances'][kind] = benchmark(filename, size=args.population, memory=not args.no_memory)
+            print(kind, *('{}: {:.3f}s'.format(name, stats['seconds'])
+                          for name, stats in reports['instances'][kind].items() if 'seconds' in stats), sep='\t')
+
+    with open(args.output, 'w') as f:
+        json.dump(reports, f, indent=2)
+    print('Report saved to', args.output)
@@ -0,0 +1,69 @@
+from typing import Dict
+from math import ceil, inf
+from common import Instance
+
+
+def reachable_bound(instance: Instance) -> int:
+    """
+    sum of scores of books held by at least one library able to sign up before the end
+    """
+    reachable = bytearray(instance.num_books)
+    for i in range(instance.num_libraries):
+        if instance.signup[i] < instance.days:
+            for book in instance.library_books(i):
+                reachable[book] = 1
+    return sum(sc for sc, r in zip(instance.scoring, reachable) if r)
+
+
+def knapsack_bound(instance: Instance) -> int:
+    """
+    LP relaxation of library selection - signup days are the knapsack of size days - 1
+    and library is worth its top books scanned from day 0, overlap of books is ignored,
+    fractional knapsack is solved exactly by taking libraries by value per signup day,
+    libraries without signup take no days and are always taken
+    """
+    days = instance.days
+    items = []
+    for i in range(instance.num_libraries):
+        signup = instance.signup[i]
+        if signup < days:
+            items.append((instance.top_value(i, (days - signup) * instance.per_day[i]), signup))
+    items.sort(key=lambda x: x[0] / x[1] if x[1] else inf, reverse=True)
+    budget = days - 1
+    bound = 0
+    for value, signup in items:
+        if signup <= budget:
+            bound += value
+            budget -= signup
+        else:
+            bound += value * budget / signup
+            break
+    return int(bound)
+
+
+def upper_bounds(instance: Instance) -> Dict[str, int]:
+    """
+    upper bounds of score of any solution, `bound` is the tightest of them
+    """
+    bounds = {'reachable': reachable_bound(instance), 'knapsack': knapsack_bound(instance)}
+    bounds['bound'] = min(bounds.values())
+    return bounds
+
+
+def gap(sc: int, bound: int) -> float:
+    """
+    relative distance of score from upper bound
+    """
+    return (bound - sc) / bound if bound else 0.0
+
+
+def target_score(bound: int, max_gap: float) -> int:
+    """
+    lowest score within max_gap from upper bound
+    """
+    return ceil(bound * (1 - max_gap))
+
+
+def print_gap(sc: int, bound: int):
+    print("Upper bound:\t", bound)
+    print("Gap:\t", gap(sc, bound))
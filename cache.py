@@ -0,0 +1,89 @@
+import hashlib
+import mmap
+import os
+import struct
+from common import Instance, atomic_write
+
+MAGIC = b'HCIN'
+VERSION = 1
+# magic, version, number of books, number of libraries, days
+HEADER = struct.Struct('<4sIqqq')
+# typecode and length in bytes of every array of Instance.arrays
+ENTRY = struct.Struct('<cxxxxxxxq')
+ALIGN = 8
+
+
+def content_hash(filename: str) -> str:
+    digest = hashlib.sha1()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_filename(filename: str, cache_dir: str = None) -> str:
+    """
+    binary cache of text instance, keyed by content hash of the text file
+    :param cache_dir: `.cache` directory next to the instance by default
+    """
+    directory, name = os.path.split(filename)
+    cache_dir = cache_dir or os.path.join(directory, '.cache')
+    return os.path.join(cache_dir, '{}.{}.bin'.format(name, content_hash(filename)[:16]))
+
+
+def save_binary(instance: Instance, filename: str):
+    """
+    Save instance arrays as binary file: header, table of arrays and array data aligned to 8 bytes,
+    file is replaced atomically
+    """
+    with atomic_write(filename) as f:
+        f.write(HEADER.pack(MAGIC, VERSION, instance.num_books, instance.num_libraries, instance.days))
+        views = [memoryview(getattr(instance, name)) for name in Instance.arrays]
+        for view in views:
+            f.write(ENTRY.pack(view.format.encode(), view.nbytes))
+        for view in views:
+            f.write(view.cast('B'))
+            f.write(bytes(-view.nbytes % ALIGN))
+
+
+def load_binary(filename: str) -> Instance:
+    """
+    Instance with arrays mapped from binary file without parsing, pages are shared by all processes mapping it
+    """
+    with open(filename, 'rb') as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    buf = memoryview(mapping)
+    magic, version, num_books, num_libraries, days = HEADER.unpack_from(buf)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('{} is not a binary instance'.format(filename))
+    offset = HEADER.size
+    entries = []
+    for _ in Instance.arrays:
+        entries.append(ENTRY.unpack_from(buf, offset))
+        offset += ENTRY.size
+    arrays = {}
+    for name, (typecode, size) in zip(Instance.arrays, entries):
+        arrays[name] = buf[offset:offset + size].cast(typecode.decode())
+        offset += size + -size % ALIGN
+    instance = Instance.from_arrays(num_books, num_libraries, days, **arrays)
+    instance.blocks = [mapping]  # keep file mapped as long as instance lives
+    return instance
+
+
+def load_instance(filename: str, cache_dir: str = None) -> Instance:
+    """
+    Load text instance through binary cache, cache is created on the first load
+    and stale caches of the same instance are removed when the text file changes
+    """
+    cached = cache_filename(filename, cache_dir)
+    if os.path.exists(cached):
+        return load_binary(cached)
+    instance = Instance(filename)
+    directory, name = os.path.split(cached)
+    os.makedirs(directory, exist_ok=True)
+    prefix = os.path.basename(filename) + '.'
+    for stale in os.listdir(directory):
+        if stale.startswith(prefix) and stale.endswith('.bin'):
+            os.remove(os.path.join(directory, stale))
+    save_binary(instance, cached)
+    return instance
@@ -1,5 +1,14 @@
-from typing import List, Tuple, Any
+from typing import List, Tuple, Any, BinaryIO, Iterator, Sequence, Iterable
+from array import array
+from itertools import islice, accumulate, chain, repeat
+from time import time
+from collections import Counter, deque
+from contextlib import contextmanager
+import threading
+import tempfile
+import gzip
 import signal
+import os
 
 
 def get_enumerated_tuple_list(lst: List[Any]) -> List[Tuple[int, Any]]:
@@ -9,22 +18,142 @@ def get_enumerated_tuple_list(lst: List[Any]) -> List[Tuple[int, Any]]:
     return result
 
 
+def iter_ints(f: BinaryIO, chunk_size: int = 1 << 20) -> Iterator[int]:
+    """
+    Stream whitespace separated integers from binary file chunk by chunk
+    """
+    tail = b''
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        tokens = (tail + chunk).split()
+        tail = b''
+        if tokens and not chunk[-1:].isspace():
+            tail = tokens.pop()
+        yield from map(int, tokens)
+    if tail:
+        yield int(tail)
+
+
 class Instance:
+    """
+    Compact instance representation
+    scoring - score of every book
+    signup, per_day - per library parameters
+    books - book ids of all libraries in single flat array, each library sorted by score desc
+    offsets - library i owns books[offsets[i]:offsets[i + 1]]
+    prefix - prefix sums of book scores of every library starting with 0,
+    library i owns prefix[offsets[i] + i:offsets[i + 1] + i + 1]
+    holders - inverted index, library ids of every book in single flat array, ascending for each book
+    holder_offsets - book b is held by holders[holder_offsets[b]:holder_offsets[b + 1]]
+    """
+
+    arrays = ('scoring', 'signup', 'per_day', 'offsets', 'books', 'prefix', 'holders', 'holder_offsets')
 
     def __init__(self, filename: str):
-        with open(filename, 'r') as f:
-            lines = list(map(lambda x: x.strip().split(' '), f.readlines()))
-        self.num_books = int(lines[0][0])
-        self.num_libraries = int(lines[0][1])
-        self.days = int(lines[0][2])
-        self.scoring = dict(get_enumerated_tuple_list(list(map(int, lines[1]))))
-        self.libraries = []
-        for i in range(2, len(lines) - 1, 2):
-            self.libraries.append([list(map(int, lines[i])), list(map(int, lines[i + 1]))])
-        self.libraries = list(
-            map(lambda x: Library(x[0][0], x[0][1], x[0][2], list(map(lambda y: (y, self.scoring[y]), x[1]))),
-                self.libraries))
-        self.libraries = get_enumerated_tuple_list(self.libraries)
+        with open(filename, 'rb') as f:
+            tokens = iter_ints(f)
+            self.num_books, self.num_libraries, self.days = islice(tokens, 3)
+            self.scoring = array('i', islice(tokens, self.num_books))
+            self.signup = array('i')
+            self.per_day = array('i')
+            self.offsets = array('q', [0])
+            self.books = array('i')
+            self.prefix = array('q')
+            key = self.scoring.__getitem__
+            for _ in range(self.num_libraries):
+                n, s, p = islice(tokens, 3)
+                self.signup.append(s)
+                self.per_day.append(p)
+                books = sorted(islice(tokens, n), key=key, reverse=True)
+                self.books.extend(books)
+                self.offsets.append(len(self.books))
+                self.prefix.append(0)
+                self.prefix.extend(accumulate(map(key, books)))
+        self._index_books()
+        self._libraries = None
+
+    def _index_books(self):
+        """
+        Build inverted index book -> libraries, positions of flat book array are stably sorted by book id
+        """
+        counts = Counter(self.books)
+        self.holder_offsets = array('q', accumulate(map(counts.__getitem__, range(self.num_books)), initial=0))
+        library_of = array('i', chain.from_iterable(
+            repeat(i, self.offsets[i + 1] - self.offsets[i]) for i in range(self.num_libraries)))
+        self.holders = array('i', map(library_of.__getitem__, sorted(range(len(self.books)), key=self.books.__getitem__)))
+
+    @classmethod
+    def from_arrays(cls, num_books: int, num_libraries: int, days: int, **arrays: Sequence[int]) -> 'Instance':
+        """
+        Instance over already built arrays (array, memoryview over shared memory etc.)
+        :param arrays: all arrays listed in Instance.arrays, inverted index is built if it is missing
+        """
+        instance = cls.__new__(cls)
+        instance.num_books = num_books
+        instance.num_libraries = num_libraries
+        instance.days = days
+        for name in cls.arrays:
+            if name in arrays:
+                setattr(instance, name, arrays[name])
+        if 'holders' not in arrays:
+            instance._index_books()
+        instance._libraries = None
+        return instance
+
+    @property
+    def libraries(self) -> List[Tuple[int, 'Library']]:
+        if self._libraries is None:
+            self._libraries = [(i, Library.view(self, i)) for i in range(self.num_libraries)]
+        return self._libraries
+
+    def library_books(self, i: int) -> memoryview:
+        """
+        Book ids of library i sorted by score desc, without copying
+        """
+        return memoryview(self.books)[self.offsets[i]:self.offsets[i + 1]]
+
+    def library_prefix(self, i: int) -> memoryview:
+        """
+        Prefix sums of book scores of library i, value of its top k books is library_prefix(i)[k]
+        """
+        return memoryview(self.prefix)[self.offsets[i] + i:self.offsets[i + 1] + i + 1]
+
+    def book_holders(self, b: int) -> memoryview:
+        """
+        Ids of libraries holding book b, without copying
+        """
+        return memoryview(self.holders)[self.holder_offsets[b]:self.holder_offsets[b + 1]]
+
+    def frequency(self, b: int) -> int:
+        """
+        Number of libraries holding book b
+        """
+        return self.holder_offsets[b + 1] - self.holder_offsets[b]
+
+    def frequencies(self) -> array:
+        """
+        Number of libraries holding every book
+        """
+        offsets = self.holder_offsets
+        return array('i', map(int.__sub__, offsets[1:], offsets[:-1]))
+
+    def top_value(self, i: int, k: int) -> int:
+        """
+        Value of top k books of library i, overlap with other libraries is ignored
+        """
+        offset = self.offsets[i]
+        return self.prefix[offset + i + max(0, min(k, self.offsets[i + 1] - offset))]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_libraries'] = None
+        state.pop('blocks', None)  # mapped file or shared memory, arrays are copied out of it below
+        for name in self.arrays:
+            if isinstance(state.get(name), memoryview):
+                state[name] = array(state[name].format, state[name])
+        return state
 
     def print(self):
         print(self.num_books, self.num_libraries, self.days)
@@ -37,10 +166,51 @@ class Library:
         self.number_of_books = n
         self.signup = s
         self.per_day = p
-        self.books = b
-        self.books.sort(key=lambda x: x[1], reverse=True)
+        b = sorted(b, key=lambda x: x[1], reverse=True)
+        self.book_ids = array('i', map(lambda x: x[0], b))
+        self.scoring = [0] * (max(self.book_ids, default=-1) + 1)
+        for book, sc in b:
+            self.scoring[book] = sc
+        self.prefix = array('q', accumulate(map(lambda x: x[1], b), initial=0))
         self.books_chosen_num = 0
 
+    @classmethod
+    def view(cls, instance: Instance, i: int) -> 'Library':
+        """
+        Library sharing book data with instance
+        """
+        library = cls.__new__(cls)
+        library.number_of_books = instance.offsets[i + 1] - instance.offsets[i]
+        library.signup = instance.signup[i]
+        library.per_day = instance.per_day[i]
+        library.book_ids = instance.library_books(i)
+        library.scoring = instance.scoring
+        library.prefix = instance.library_prefix(i)
+        library.books_chosen_num = 0
+        return library
+
+    @property
+    def books(self) -> List[Tuple[int, int]]:
+        """
+        (id, score) tuples sorted by score desc
+        """
+        scoring = self.scoring
+        return [(book, scoring[book]) for book in self.book_ids]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if isinstance(self.book_ids, memoryview):
+            state['book_ids'] = array('i', self.book_ids)
+        if isinstance(self.prefix, memoryview):
+            state['prefix'] = array('q', self.prefix)
+        return state
+
+    def top_value(self, k: int) -> int:
+        """
+        Value of top k books, overlap with other libraries is ignored
+        """
+        return self.prefix[max(0, min(k, self.number_of_books))]
+
     def print(self):
         print('N: ', self.number_of_books, '\tS: ', self.signup, '\tP: ', self.per_day)
         print(self.books)
@@ -52,13 +222,13 @@ def transform_result(result: List[Tuple[int, Library]], total_days: int) -> List
     """
     res = []
     start = 0
-    books_scanned = set()
+    books_scanned = scanned_mask(result)
     for i, library in result:
         books = get_scanable_books(library, total_days, start, books_scanned)
         if not books:
             continue
-        res.append((i, list(map(lambda x: x[0], books))))
-        books_scanned = books_scanned.union(set(books))
+        res.append((i, books))
+        mark_scanned(books, books_scanned)
 
         start += library.signup
 
@@ -66,17 +236,113 @@ def transform_result(result: List[Tuple[int, Library]], total_days: int) -> List
 
 
 def save_result(result: List[Tuple[int, List[int]]], filename: str):
-    with open(filename, 'w+') as f:
-        f.write(str(len(result))+'\n')
-        for r in result:
-            f.write(str(r[0]) + ' ' + str(len(r[1])) + '\n')
-            f.write(" ".join(list(map(str, r[1]))) + '\n')
+    save_atomic(result, filename)
+
+
+def write_result(f: BinaryIO, result: Iterable[Tuple[int, Sequence[int]]], count: int, chunk_size: int = 1 << 20):
+    """
+    Write result to binary file in chunks of about chunk_size bytes
+    :param result: (library, books) pairs, may be lazy
+    :param count: number of pairs in result
+    """
+    f.write(b'%d\n' % count)
+    chunk = []
+    size = 0
+    for i, books in result:
+        line = '%d %d\n%s\n' % (i, len(books), ' '.join(map(str, books)))
+        chunk.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            f.write(''.join(chunk).encode())
+            chunk = []
+            size = 0
+    f.write(''.join(chunk).encode())
+
+
+def result_counts(libraries: List[Tuple[int, Library]], total_days: int) -> array:
+    """
+    Number of books scanned by every library of ordering
+    """
+    counts = array('i', bytes(4 * len(libraries)))
+    start = 0
+    books_scanned = scanned_mask(libraries)
+    for pos, (i, library) in enumerate(libraries):
+        books = get_scanable_books(library, total_days, start, books_scanned)
+        if not books:
+            continue
+        counts[pos] = len(books)
+        mark_scanned(books, books_scanned)
+        start += library.signup
+    return counts
+
+
+def iter_result(libraries: List[Tuple[int, Library]], counts: Sequence[int],
+                library_ids: Sequence[int] = None) -> Iterator[Tuple[int, List[int]]]:
+    """
+    Lazy transform_result of ordering with known number of books scanned by every library,
+    library takes first counts[pos] books not scanned yet, only books of single library are held in memory
+    :param library_ids: original ids of libraries (see pruning.Pruned)
+    """
+    books_scanned = scanned_mask(libraries)
+    for (i, library), count in zip(libraries, counts):
+        if not count:
+            continue
+        books = list(islice((book for book in library.book_ids if not books_scanned[book]), count))
+        mark_scanned(books, books_scanned)
+        yield (library_ids[i] if library_ids is not None else i), books
+
+
+def open_result(filename: str) -> BinaryIO:
+    """
+    Result file opened for reading, gzip files are recognized by .gz extension
+    """
+    return gzip.open(filename, 'rb') if filename.endswith('.gz') else open(filename, 'rb')
+
+
+def load_result(filename: str) -> List[Tuple[int, List[int]]]:
+    """
+    Read result written by save_result
+    """
+    with open_result(filename) as f:
+        tokens = iter_ints(f)
+        result = []
+        for _ in range(next(tokens, 0)):
+            i, n = islice(tokens, 2)
+            result.append((i, list(islice(tokens, n))))
+    return result
+
+
+def load_ordering(filename: str, num_libraries: int, library_ids: Sequence[int] = None) -> List[int]:
+    """
+    Ordering of libraries of result file, file is streamed and book lists are skipped,
+    libraries missing in the file are appended in index order
+    :param library_ids: original ids of libraries (see pruning.Pruned), libraries of file missing in them are dropped
+    """
+    position = {it: i for i, it in enumerate(library_ids)} if library_ids is not None else None
+    order = []
+    used = bytearray(num_libraries)
+    with open_result(filename) as f:
+        tokens = iter_ints(f)
+        for _ in range(next(tokens, 0)):
+            i, n = islice(tokens, 2)
+            deque(islice(tokens, n), maxlen=0)
+            if position is not None:
+                if i not in position:
+                    continue
+                i = position[i]
+            if not 0 <= i < num_libraries or used[i]:
+                raise ValueError('{}: unknown or duplicate library {}'.format(filename, i))
+            used[i] = 1
+            order.append(i)
+    order.extend(i for i in range(num_libraries) if not used[i])
+    return order
 
 
 def score(libraries: List[Tuple[int, Library]], total_days: int, num_books: int = -1, num_libraries: int = -1, verbose: bool = True) -> int:
     start = 0
     sc = 0
-    books_scanned = set()
+    books_scanned = scanned_mask(libraries)
+    num_scanned = 0
     free_slots = 0
     libs_used = 0
     all_slots = 0
@@ -85,8 +351,9 @@ def score(libraries: List[Tuple[int, Library]], total_days: int, num_books: int
         if not books:
             continue
 
-        sc += sum(list(map(lambda x: x[1], books)))
-        books_scanned = books_scanned.union(set(books))
+        sc += books_score(library, books)
+        mark_scanned(books, books_scanned)
+        num_scanned += len(books)
 
         val = max(0, total_days - start - library.signup) * library.per_day
         all_slots += val
@@ -98,10 +365,10 @@ def score(libraries: List[Tuple[int, Library]], total_days: int, num_books: int
     
     if verbose:
         if num_books > 0:
-            print("Used:\t", len(books_scanned), "of", num_books, "books")
-            print("Percent:\t", len(books_scanned)/num_books)
+            print("Used:\t", num_scanned, "of", num_books, "books")
+            print("Percent:\t", num_scanned/num_books)
         else:
-            print("Books used: \t", len(books_scanned))
+            print("Books used: \t", num_scanned)
         if num_libraries > 0:
             print("Used:\t", libs_used, "of", num_libraries, "libraries")
             print("Percent:\t", libs_used/num_libraries)
@@ -113,12 +380,41 @@ def score(libraries: List[Tuple[int, Library]], total_days: int, num_books: int
     return sc
 
 
-def get_scanable_books(library: Library, total_days: int, start: int, books_scanned: set) -> list:
+def get_scanable_books(library: Library, total_days: int, start: int, books_scanned: Sequence[int]) -> List[int]:
+    """
+    Walk books of library (already sorted by score desc) skipping scanned ones
+    until the capacity of library signed up at day start is filled
+    :param books_scanned: mask indexed by book id, nonzero if book is already scanned
+    :return: ids of books to scan
+    """
     days = max(0, total_days - start - library.signup)
     able_to_be_scanned = days*library.per_day
-    books_to_scan = list(set(library.books).difference(books_scanned))
-    books_to_scan.sort(key=lambda x: x[1], reverse=True)
-    return books_to_scan[:able_to_be_scanned]
+    books_to_scan = []
+    if not able_to_be_scanned:
+        return books_to_scan
+    for book in library.book_ids:
+        if not books_scanned[book]:
+            books_to_scan.append(book)
+            if len(books_to_scan) == able_to_be_scanned:
+                break
+    return books_to_scan
+
+
+def scanned_mask(libraries: List[Tuple[int, Library]]) -> bytearray:
+    """
+    Empty mask of scanned books covering all books of libraries
+    """
+    return bytearray(max((len(library.scoring) for _, library in libraries), default=0))
+
+
+def mark_scanned(books: List[int], books_scanned: bytearray):
+    for book in books:
+        books_scanned[book] = 1
+
+
+def books_score(library: Library, books: List[int]) -> int:
+    return sum(map(library.scoring.__getitem__, books))
+
 
 
 class GracefulKiller:
@@ -129,4 +425,111 @@ class GracefulKiller:
 
     def exit_gracefully(self,signum, frame):
         print('Kill signal is bein handled, wait for iteration to finish')
-        self.kill_now = True
\ No newline at end of file
+        self.kill_now = True
+
+
+class Checkpointer:
+    """
+    Periodically saves the best solution so far in a background thread
+    file is written to temporary file first and then atomically replaced, so it is never left half written
+    """
+
+    def __init__(self, filename: str, total_days: int, interval: float = 60.0, library_ids: Sequence[int] = None,
+                 compress: bool = False):
+        """
+        :param library_ids: original ids of libraries (see pruning.Pruned)
+        :param compress: write gzip file
+        """
+        self.filename = filename
+        self.library_ids = library_ids
+        self.compress = compress
+        self.days = total_days
+        self.interval = interval
+        self.best = None
+        self.best_score = -1
+        self.saved_score = -1
+        self.last = time()
+        self.condition = threading.Condition()
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def update(self, libraries: List[Tuple[int, Library]], sc: int):
+        """
+        register solution, it is saved at the next checkpoint if it is the best one so far, never blocks
+        """
+        with self.condition:
+            if sc > self.best_score:
+                self.best = libraries
+                self.best_score = sc
+            if time() - self.last >= self.interval:
+                self.condition.notify()
+
+    def close(self):
+        """
+        save pending best solution and stop the writer
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.thread.join()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                # flags are checked before waiting, so close() during save_stream is not missed
+                while not self.closed and time() < self.last + self.interval:
+                    self.condition.wait(self.last + self.interval - time())
+                closed = self.closed
+                best, best_score = self.best, self.best_score
+                self.last = time()
+            if best is not None and best_score > self.saved_score:
+                save_stream(best, self.days, self.filename, library_ids=self.library_ids, compress=self.compress)
+                self.saved_score = best_score
+            if closed:
+                break
+
+
+@contextmanager
+def atomic_write(filename: str) -> Iterator[BinaryIO]:
+    """
+    Binary file which atomically replaces filename when the block ends, it is removed if the block fails
+    """
+    directory, name = os.path.split(filename)
+    fd, temp = tempfile.mkstemp(prefix='.' + name, dir=directory or '.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            yield f
+        os.chmod(temp, 0o644)
+        os.replace(temp, filename)
+    except BaseException:
+        os.remove(temp)
+        raise
+
+
+def save_atomic(result: Iterable[Tuple[int, Sequence[int]]], filename: str, count: int = None,
+                compress: bool = False):
+    """
+    Write result to temporary file and atomically replace filename with it
+    :param result: (library, books) pairs, may be lazy
+    :param count: number of pairs in result, required if result is lazy
+    :param compress: write gzip file
+    """
+    with atomic_write(filename) as f:
+        if compress:
+            with gzip.GzipFile(fileobj=f, mode='wb', compresslevel=6) as z:
+                write_result(z, result, count if count is not None else len(result))
+        else:
+            write_result(f, result, count if count is not None else len(result))
+
+
+def save_stream(libraries: List[Tuple[int, Library]], total_days: int, filename: str, counts: Sequence[int] = None,
+                library_ids: Sequence[int] = None, compress: bool = False):
+    """
+    Save ordering without building whole result in memory, see save_atomic
+    :param counts: number of books scanned by every library (e.g. Chromosome.chosen), computed if not given
+    :param library_ids: original ids of libraries (see pruning.Pruned)
+    """
+    if counts is None:
+        counts = result_counts(libraries, total_days)
+    save_atomic(iter_result(libraries, counts, library_ids), filename, sum(1 for c in counts if c), compress)
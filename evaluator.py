@@ -0,0 +1,172 @@
+from typing import List, Tuple, Sequence
+from array import array
+from common import Library, get_scanable_books, books_score
+
+
+class Evaluator:
+    """
+    Incremental score evaluator for library ordering
+    keeps schedule of current ordering and owner of every book (position + 1, 0 if not scanned),
+    so any change is scored by simulating only the suffix after first changed position,
+    until the schedule behind the last changed position is back in sync with the stored one
+    """
+
+    def __init__(self, libraries: List[Tuple[int, Library]], total_days: int, order: Sequence[int] = None):
+        """
+        :param libraries: libraries indexed by order entries
+        :param total_days: number of days
+        :param order: ordering as indices of libraries list, defaults to libraries order
+        """
+        self.libraries = libraries
+        self.days = total_days
+        # no library can sign up with at least one day left from this day on
+        self.closing = total_days - min((library.signup for _, library in libraries), default=0)
+        self.order = []
+        self.owner = array('i', bytes(4 * max((len(library.scoring) for _, library in libraries), default=0)))
+        self.starts = [0]
+        self.acc = [0]
+        self.chosen = []
+        self.split = 0
+        self._simulate(0, range(len(libraries)) if order is None else order)
+
+    @property
+    def score(self) -> int:
+        return self.acc[-1]
+
+    def ordering(self) -> List[Tuple[int, Library]]:
+        return [self.libraries[it] for it in self.order]
+
+    def chosen_counts(self) -> List[int]:
+        return list(map(len, self.chosen))
+
+    def _release(self, pos: int):
+        owner = self.owner
+        for books in self.chosen[pos:]:
+            for book in books:
+                owner[book] = 0
+
+    def _claim(self, pos: int, books: List[int]):
+        owner = self.owner
+        for book in books:
+            owner[book] = pos + 1
+
+    def _simulate(self, pos: int, suffix: Sequence[int]):
+        """
+        replace ordering from position pos with suffix and recompute schedule of the suffix
+        """
+        self._release(pos)
+        del self.order[pos:], self.chosen[pos:], self.starts[pos + 1:], self.acc[pos + 1:]
+        self.split = next((q + 1 for q in range(min(self.split, pos) - 1, -1, -1) if self.chosen[q]), 0)
+        start = self.starts[pos]
+        sc = self.acc[pos]
+        for k, it in enumerate(suffix):
+            if start >= self.closing:
+                rest = len(suffix) - k
+                self.order.extend(suffix[k:])
+                self.chosen.extend([()] * rest)
+                self.starts.extend([start] * rest)
+                self.acc.extend([sc] * rest)
+                break
+            library = self.libraries[it][1]
+            books = get_scanable_books(library, self.days, start, self.owner)
+            if books:
+                self._claim(len(self.order), books)
+                sc += books_score(library, books)
+                start += library.signup
+                self.split = len(self.order) + 1
+            self.order.append(it)
+            self.chosen.append(books)
+            self.starts.append(start)
+            self.acc.append(sc)
+
+    def evaluate(self, pos: int, suffix: Sequence[int], tail: int = 0) -> int:
+        """
+        score of ordering with suffix from position pos replaced, current state is preserved
+        :param tail: number of trailing entries of suffix equal to the end of current ordering,
+            simulation stops inside the tail as soon as start day and scanned books are the same as in stored schedule
+        """
+        owner = self.owner
+        days = self.days
+        start = self.starts[pos]
+        sc = self.acc[pos]
+        shift = len(self.order) - pos - len(suffix)  # suffix[k] of the tail is at position pos + k + shift now
+        synced = len(suffix) - tail
+        diff = set()  # books scanned by only one of stored and new schedule, built lazily at sync checks
+        old = pos  # stored positions before this one are accounted in diff
+        new = 0  # books of taken before this one are accounted in diff
+        taken = []  # books claimed by new suffix
+        saved = []  # their owners in stored schedule
+        for k, it in enumerate(suffix):
+            if k >= synced:
+                q = pos + k + shift
+                if start == self.starts[q] and sc == self.acc[q]:  # necessary for the same scanned books
+                    for books in self.chosen[old:q]:
+                        diff.symmetric_difference_update(books)
+                    diff.symmetric_difference_update(taken[new:])
+                    old, new = q, len(taken)
+                    if not diff:
+                        sc += self.acc[-1] - self.acc[q]
+                        break
+            if start >= self.closing:
+                break
+            library = self.libraries[it][1]
+            capacity = max(0, days - start - library.signup) * library.per_day
+            if not capacity:
+                continue
+            books = []
+            for book in library.book_ids:
+                o = owner[book]
+                if not o or o > pos:  # free or scanned by stored suffix only, -1 marks books of new suffix
+                    books.append(book)
+                    if len(books) == capacity:
+                        break
+            if books:
+                taken.extend(books)
+                saved.extend(map(owner.__getitem__, books))
+                for book in books:
+                    owner[book] = -1
+                sc += books_score(library, books)
+                start += library.signup
+        for book, o in zip(taken, saved):
+            owner[book] = o
+        return sc
+
+    def _swapped(self, a: int, b: int) -> Tuple[int, List[int]]:
+        a, b = min(a, b), max(a, b)
+        suffix = self.order[a:]
+        suffix[0], suffix[b - a] = suffix[b - a], suffix[0]
+        return a, suffix
+
+    def _moved(self, src: int, dst: int) -> Tuple[int, List[int]]:
+        pos = min(src, dst)
+        suffix = self.order[pos:]
+        suffix.insert(dst - pos, suffix.pop(src - pos))
+        return pos, suffix
+
+    def evaluate_swap(self, a: int, b: int) -> int:
+        return self.evaluate(*self._swapped(a, b), len(self.order) - max(a, b) - 1)
+
+    def evaluate_move(self, src: int, dst: int) -> int:
+        return self.evaluate(*self._moved(src, dst), len(self.order) - max(src, dst) - 1)
+
+    def evaluate_insert(self, pos: int, it: int) -> int:
+        return self.evaluate(pos, [it] + self.order[pos:], len(self.order) - pos)
+
+    def evaluate_remove(self, pos: int) -> int:
+        return self.evaluate(pos, self.order[pos + 1:], len(self.order) - pos - 1)
+
+    def swap(self, a: int, b: int) -> int:
+        self._simulate(*self._swapped(a, b))
+        return self.score
+
+    def move(self, src: int, dst: int) -> int:
+        self._simulate(*self._moved(src, dst))
+        return self.score
+
+    def insert(self, pos: int, it: int) -> int:
+        self._simulate(pos, [it] + self.order[pos:])
+        return self.score
+
+    def remove(self, pos: int) -> int:
+        self._simulate(pos, self.order[pos + 1:])
+        return self.score
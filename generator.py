@@ -0,0 +1,77 @@
+from typing import Dict, Any, TextIO
+from random import Random
+import argparse
+
+
+# shapes of competition instances, counts are scaled by `scale`
+SHAPES: Dict[str, Dict[str, Any]] = {
+    # tiny example, not scaled
+    'a': dict(books=6, libraries=2, days=7, lib_books=(3, 5), signup=(2, 3), per_day=(1, 2), scores=(1, 6), fixed=True),
+    # few libraries with many books, uniform scores
+    'b': dict(books=100000, libraries=100, days=1000, lib_books=(1000, 1000), signup=(10, 10), per_day=(1, 1),
+              scores=(100, 100)),
+    # many small libraries, long signups
+    'c': dict(books=100000, libraries=10000, days=100000, lib_books=(1, 100), signup=(1, 1000), per_day=(1, 100),
+              scores=(1, 600)),
+    # tough choices - every book is in two or three tiny libraries, uniform scores
+    'd': dict(books=78600, libraries=30000, days=30001, lib_books=(1, 14), signup=(2, 2), per_day=(1, 1),
+              scores=(65, 65), duplicates=True),
+    # many books per library, fast scanning
+    'e': dict(books=100000, libraries=1000, days=200, lib_books=(20, 1000), signup=(1, 10), per_day=(1, 10),
+              scores=(1, 100)),
+    # few huge libraries, short time
+    'f': dict(books=100000, libraries=1000, days=700, lib_books=(1, 1000), signup=(1, 300), per_day=(1, 10),
+              scores=(1, 800), huge=0.01),
+}
+
+
+def write_instance(f: TextIO, kind: str, scale: float = 1.0, seed: int = 0):
+    """
+    Write deterministic synthetic instance shaped like competition instance `kind`
+    :param f: text file
+    :param kind: one of a-f
+    :param scale: multiplier of number of books, libraries and days
+    :param seed: random seed
+    """
+    shape = SHAPES[kind]
+    if shape.get('fixed'):
+        scale = 1.0
+    rnd = Random('{}-{}-{}'.format(kind, scale, seed))
+    num_books = max(1, int(shape['books'] * scale))
+    num_libraries = max(1, int(shape['libraries'] * scale))
+    days = max(1, int(shape['days'] * scale))
+    f.write('{} {} {}\n'.format(num_books, num_libraries, days))
+    f.write(' '.join(str(rnd.randint(*shape['scores'])) for _ in range(num_books)) + '\n')
+    cursor = 0
+    for _ in range(num_libraries):
+        n = min(num_books, rnd.randint(*shape['lib_books']))
+        if rnd.random() < shape.get('huge', 0):
+            n = min(num_books, n * 50)
+        if shape.get('duplicates'):
+            # consecutive libraries overlap, so every book is shared with its neighbours
+            books = [(cursor + j) % num_books for j in range(n)]
+            cursor = (cursor + max(1, n // 2)) % num_books
+        else:
+            books = rnd.sample(range(num_books), n)
+        f.write('{} {} {}\n'.format(n, rnd.randint(*shape['signup']), rnd.randint(*shape['per_day'])))
+        f.write(' '.join(map(str, books)) + '\n')
+
+
+def generate(filename: str, kind: str, scale: float = 1.0, seed: int = 0):
+    with open(filename, 'w') as f:
+        write_instance(f, kind, scale, seed)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate synthetic instance shaped like one of competition instances")
+    parser.add_argument('instance', type=str, choices=sorted(SHAPES),
+        help='Shape of instance')
+    parser.add_argument('filename', type=str,
+        help='Output file')
+    parser.add_argument('-s', '--scale', type=float, default=1.0,
+        help='Scale of number of books, libraries and days')
+    parser.add_argument('--seed', type=int, default=0,
+        help='Random seed')
+    args = parser.parse_args()
+
+    generate(args.filename, args.instance, args.scale, args.seed)
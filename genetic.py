@@ -1,60 +1,150 @@
-from typing import List, Tuple
-from random import shuffle, sample, randrange, choice
-from copy import deepcopy
-from multiprocessing import Pool, cpu_count
-from common import transform_result, save_result, Instance, Library, score, get_scanable_books, GracefulKiller
+from typing import List, Tuple, Sequence, Dict, Any, Callable
+from random import shuffle, sample, randrange, choice, seed, getstate, setstate
+from array import array
+from multiprocessing import Pool, Process, Queue, cpu_count
+from common import save_stream, load_ordering, Instance, Library, score, get_scanable_books, mark_scanned, \
+    books_score, GracefulKiller, Checkpointer
 import itertools
+from queue import Empty
 from time import time
 import argparse
-from sortings import sort_by_num_books_desc, sort_by_setup_time_asc, sort_by_sum_book_scores_desc
+from cache import load_instance
+from evaluator import Evaluator
+from shared import SharedInstance, attach_instance
+from pruning import prune
+from bounds import upper_bounds, target_score, print_gap
+from vectorized import NumpyScorer, evaluate_batch
+from snapshot import save_snapshot, load_snapshot, instance_digest
+from local_search import complete_order
+from main import basic
+from sortings import sort_by_num_books_desc, sort_by_setup_time_asc, sort_by_sum_book_scores_desc, \
+    sort_by_perday_desc, sort_by_throughput_desc
+from heuristics import HEURISTICS
+
+
+_instance = None
+_scorer = None
+
+# heuristics seeding initial population, every one gives (possibly partial) ranking of libraries
+SEEDS: Dict[str, Callable[[Instance], List[Tuple[int, Library]]]] = {
+    'basic': basic,
+    'setup': lambda instance: sort_by_setup_time_asc(instance.libraries),
+    'books': lambda instance: sort_by_num_books_desc(instance.libraries),
+    'sum': lambda instance: sort_by_sum_book_scores_desc(instance.libraries),
+    'perday': lambda instance: sort_by_perday_desc(instance.libraries),
+    'throughput': lambda instance: sort_by_throughput_desc(instance.libraries),
+    **HEURISTICS,
+}
+
+
+def set_instance(instance: Instance, engine: str = 'python'):
+    """
+    set instance shared by all chromosomes of the process, used as pool initializer
+    :param engine: scoring engine of chromosomes, `python` or `numpy`
+    """
+    global _instance, _scorer
+    _instance = instance
+    _scorer = NumpyScorer(instance) if engine == 'numpy' else None
+
+
+def attach_worker(descriptor: Dict[str, Any], engine: str = 'python'):
+    """
+    pool initializer attaching instance placed in shared memory by the parent process
+    """
+    set_instance(attach_instance(descriptor), engine)
 
 
 class Chromosome:
+    """
+    chromosome is a permutation of library indices with cached score and split,
+    library data is shared from single instance and it is not pickled with the chromosome
+    """
 
     mutation_probability = 0.75
 
-    def __init__(self, instance: Instance):
+    def __init__(self, instance: Instance, order: Sequence[int] = None, evaluate: bool = True):
+        """
+        :param evaluate: calculate split and score now, otherwise chromosome has to be evaluated later
+        (e.g. together with whole population with evaluate_population)
+        """
+        self.instance = instance
         self.days = instance.days
-        self.libraries = deepcopy(instance.libraries)  # initialize with random solution
-        shuffle(self.libraries)
+        if order is None:
+            order = list(range(instance.num_libraries))  # initialize with random solution
+            shuffle(order)
+        self.order = array('i', order)
+        self.chosen = array('i', bytes(4 * len(self.order)))
         self.split = 0
         self.score = 0
-        self.calculate_split_and_score()
+        if evaluate:
+            self.calculate_split_and_score()
+
+    @property
+    def libraries(self) -> List[Tuple[int, Library]]:
+        libraries = self.instance.libraries
+        return [libraries[it] for it in self.order]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['instance']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.instance = _instance
+
+    def copy(self) -> 'Chromosome':
+        c = self.__class__.__new__(self.__class__)
+        c.__dict__.update(self.__dict__)
+        c.order = array('i', self.order)
+        c.chosen = array('i', self.chosen)
+        return c
 
     def calculate_split_and_score(self):
+        if _scorer is not None and self.instance is _instance:
+            self.score, self.split, chosen = _scorer.evaluate(self.order)
+            self.chosen = array('i', chosen.tolist())
+            return
         start = 0
         sc = 0
-        books_scanned = set()
-        for it, tup in enumerate(self.libraries):
-            library = tup[1]
+        libraries = self.instance.libraries
+        books_scanned = bytearray(self.instance.num_books)
+        for it, lib in enumerate(self.order):
+            library = libraries[lib][1]
             books = get_scanable_books(library, self.days, start, books_scanned)
+            self.chosen[it] = len(books)
             if not books:
-                library.books_chosen_num = 0
                 continue
             else:
                 self.split = it + 1
 
-            sc += sum(list(map(lambda x: x[1], books)))
-            books_scanned = books_scanned.union(set(books))
-            library.books_chosen_num = len(books)
+            sc += books_score(library, books)
+            mark_scanned(books, books_scanned)
             start += library.signup
         self.score = sc
 
-    def mutate(self):
+    def mutate(self, times: int = 1):
         """
-        mutation strategy version 1
-        swap single library from above and below split point
-        at this point algorithm always tries to apply mutation (probability of mutation is 1)
+        mutation strategy version 2
+        swap single library from above and below split point, keep the swap if it improves score
+        swaps are scored incrementally from the first swapped position only
+        :param times: number of mutation attempts
         :return:
         """
-        self.calculate_split_and_score()
-        libs = self.libraries.copy()
-        a = randrange(0, self.split)
-        b = randrange(self.split if self.split != len(self.libraries) else 0, len(self.libraries))
-        libs[a], libs[b] = libs[b], libs[a]
-        sc = score(libs, self.days, verbose=False)
-        if sc > self.score:
-            self.libraries = libs
+        evaluator = Evaluator(self.instance.libraries, self.days, self.order)
+        n = len(self.order)
+        for _ in range(times):
+            split = evaluator.split
+            if not split:
+                break
+            a = randrange(0, split)
+            b = randrange(split if split != n else 0, n)
+            if evaluator.evaluate_swap(a, b) > evaluator.score:
+                evaluator.swap(a, b)
+        self.order = array('i', evaluator.order)
+        self.score = evaluator.score
+        self.split = evaluator.split
+        self.chosen = array('i', evaluator.chosen_counts())
 
     def reorder_libraries(self):
         """
@@ -63,21 +153,18 @@ class Chromosome:
         """
         kickoffs = []
         for j in range(self.split):
-            lib = self.libraries[j]
-            if lib[1].books_chosen_num == 0:
+            if self.chosen[j] == 0:
                 kickoffs.append(j)
 
         kickoffs.reverse()
         for j in kickoffs:
-            self.libraries.append(self.libraries.pop(j))
+            self.order.append(self.order.pop(j))
+            self.chosen.append(self.chosen.pop(j))
 
 
 class ChromosomeInitialized(Chromosome):
 
-    def __init__(self, instance: Instance):
-        self.days = instance.days
-        self.libraries = deepcopy(instance.libraries)
-        probs = []
+    def __init__(self, instance: Instance, evaluate: bool = True):
         methods = [
             do_shuffle,
             do_shuffle,
@@ -87,10 +174,7 @@ class ChromosomeInitialized(Chromosome):
             sort_by_sum_book_scores_desc
         ]
         m = choice(methods)
-        self.libraries = m(self.libraries)
-        self.split = 0
-        self.score = 0
-        self.calculate_split_and_score()
+        super().__init__(instance, [it for it, _ in m(instance.libraries.copy())], evaluate)
 
 
 def do_shuffle(libraries: List[Tuple[int, Library]]) -> List[Tuple[int, Library]]:
@@ -108,33 +192,25 @@ def tournament(chromosomes: List[Chromosome], k=4) -> Chromosome:
 
 
 def crossover(a: Chromosome, b: Chromosome) -> Tuple[Chromosome, Chromosome]:
-    ap = deepcopy(a)
-    bp = deepcopy(b)
-    # ap = a
-    # ap.libraries = a.libraries.copy()
-    # bp = b
-    # bp.libraries = b.libraries.copy()
+    ap = a.copy()
+    bp = b.copy()
     ap.reorder_libraries()
     bp.reorder_libraries()
     # choose split point
     split = min(ap.split, bp.split)
     point = randrange(1, split)
 
-    a_libs = ap.libraries[:point]
-    a_ids = set(map(lambda x: x[0], a_libs))
-    b_libs = bp.libraries[:point]
-    b_ids = set(map(lambda x: x[0], b_libs))
+    a_libs = ap.order[:point]
+    a_ids = set(a_libs)
+    b_libs = bp.order[:point]
+    b_ids = set(b_libs)
 
-    for it, l in bp.libraries:
-        if it not in a_ids:
-            a_libs.append((it, l))
-    for it, l in ap.libraries:
-        if it not in b_ids:
-            b_libs.append((it, l))
+    a_libs.extend(it for it in bp.order if it not in a_ids)
+    b_libs.extend(it for it in ap.order if it not in b_ids)
 
-    assert len(a_libs) == len(b_libs) == len(ap.libraries) == len(bp.libraries)
-    ap.libraries = a_libs
-    bp.libraries = b_libs
+    assert len(a_libs) == len(b_libs) == len(ap.order) == len(bp.order)
+    ap.order = a_libs
+    bp.order = b_libs
 
     return ap, bp
 
@@ -145,11 +221,106 @@ def tournament_and_crossover(chromosomes: List[Chromosome], k=4) -> Tuple[Chromo
     return crossover(a, b)
 
 
-def chromosome_factory(instance: Instance) -> Chromosome:
-    return Chromosome(instance)
+def breed(parents: List[Tuple[Chromosome, Chromosome]], mutations: int = 1) -> List[Chromosome]:
+    """
+    worker task of generation - crossover and mutation of parents selected by the caller
+    mutation keeps score of offspring up to date, without mutation offspring is rescored in single batch evaluation
+    """
+    children = []
+    for a, b in parents:
+        children.extend(crossover(a, b))
+    if mutations:
+        for c in children:
+            mutate(c, mutations)
+    else:
+        evaluate_population(children)
+    return children
+
+
+def evaluated(chromosomes: List[Chromosome]) -> List[Chromosome]:
+    evaluate_population(chromosomes)
+    return chromosomes
+
+
+def initial_population(size: int) -> List[Chromosome]:
+    population = [ChromosomeInitialized(_instance, evaluate=False) for _ in range(size)]
+    evaluate_population(population)
+    return population
+
+
+def seed_chromosome(name: str) -> Chromosome:
+    """
+    chromosome built by seeding heuristic, libraries missing in its ranking are appended
+    """
+    return Chromosome(_instance, complete_order(_instance, SEEDS[name](_instance)))
+
+
+def perturb(c: Chromosome, strength: float = 0.05) -> Chromosome:
+    """
+    copy of chromosome with `strength` share of libraries above split swapped with random positions, not evaluated
+    """
+    order = array('i', c.order)
+    top = max(1, c.split)
+    for _ in range(max(1, int(strength * top))):
+        a, b = randrange(top), randrange(len(order))
+        order[a], order[b] = order[b], order[a]
+    return Chromosome(c.instance, order, evaluate=False)
+
 
-def chromosome_i_factory(instance: Instance) -> Chromosome:
-    return ChromosomeInitialized(instance)
+def perturbed_population(sources: List[Chromosome], strength: float = 0.05) -> List[Chromosome]:
+    population = [perturb(c, strength) for c in sources]
+    evaluate_population(population)
+    return population
+
+
+def seeded_population(size: int, seeds: Sequence[str], share: float = 0.5, strength: float = 0.05,
+                      pool: Pool = None, tasks: int = 1, initial: Sequence[Sequence[int]] = ()) -> List[Chromosome]:
+    """
+    initial population - chromosomes of seeding heuristics, their perturbed copies and the rest initialized randomly
+    :param seeds: names of heuristics from SEEDS
+    :param share: share of population built from seeds and their perturbed copies,
+                  raised so that every seed gets a slot
+    :param strength: share of libraries above split moved in perturbed copy
+    :param pool: heuristics and copies are computed in the pool if given
+    :param initial: orderings (e.g. loaded results) placed into population first, they are seeds as well
+    """
+    map_ = pool.map if pool is not None else map
+    population = [Chromosome(_instance, order) for order in initial[:size]]
+    selected = len(population) + len(seeds)
+    if selected > size:
+        print('Warning: population of {} cannot hold {} seeds, {} dropped'.format(size, selected, selected - size))
+    seeded = min(size, max(int(size * share), selected)) if selected else 0
+    population.extend(map_(seed_chromosome, seeds[:seeded - len(population)]))
+    if seeded > len(population) > 0:
+        # copies are taken round-robin over all seeds before the work is split between tasks
+        sources = [population[it % len(population)] for it in range(seeded - len(population))]
+        parts = [(part, strength) for part in split_tasks(sources, tasks)]
+        population.extend(flatten(pool.starmap(perturbed_population, parts) if pool is not None
+                                  else itertools.starmap(perturbed_population, parts)))
+    population.extend(flatten(map_(initial_population, map(len, split_tasks(range(size - seeded), tasks)))))
+    return population
+
+
+def evaluate_population(chromosomes: List[Chromosome]):
+    """
+    calculate split and score of all chromosomes in one batch
+    """
+    scores, splits, chosen = evaluate_batch(_instance, [c.order for c in chromosomes], _scorer)
+    for c, sc, split, ch in zip(chromosomes, scores, splits, chosen):
+        c.score = sc
+        c.split = split
+        c.chosen = array('i', ch)
+
+
+def split_tasks(lst: List[Any], parts: int) -> List[List[Any]]:
+    return [lst[it::parts] for it in range(min(parts, len(lst)))]
+
+
+def chromosome_factory(_: int = 0) -> Chromosome:
+    return Chromosome(_instance)
+
+def chromosome_i_factory(_: int = 0) -> Chromosome:
+    return ChromosomeInitialized(_instance)
 
 
 def flatten(pre_population: List[Tuple[Chromosome, Chromosome]]) -> List[Chromosome]:
@@ -157,53 +328,207 @@ def flatten(pre_population: List[Tuple[Chromosome, Chromosome]]) -> List[Chromos
 
 
 def mutate(c: Chromosome, times: int = 1) -> Chromosome:
-    for _ in range(times):
-        c.mutate()
-        c.calculate_split_and_score()
+    c.mutate(times)
     return c
 
 
-def genetic(instance: Instance, size=64, iterations=10, k=4, mutations=5) -> List[Tuple[int, Library]]:
+def genetic(instance: Instance, size=64, iterations=10, k=4, mutations=5, engine='python', time_limit=None,
+            checkpoint: Checkpointer = None, snapshot: str = None, snapshot_interval=10, resume=False,
+            seeds: Sequence[str] = tuple(SEEDS), seed_share=0.5, perturbation=0.05,
+            target: int = None, initial: Sequence[Sequence[int]] = ()) -> List[Tuple[int, Library]]:
     """
     genetic algorithm version 1
     :param instance: instance object
     :param size: population size
-    :param iterations: number of iterations
+    :param iterations: number of iterations, None for no limit
     :param k: tournament size
+    :param engine: scoring engine, `python` or `numpy`
+    :param time_limit: wall-clock budget in seconds, no new generation is started if it would not fit
+    :param checkpoint: checkpointer receiving every improvement of the best solution
+    :param snapshot: population snapshot file, written every snapshot_interval iterations and at the end
+    :param snapshot_interval: number of iterations between snapshots
+    :param resume: continue from snapshot, iterations are counted from the snapshot iteration
+    :param seeds: heuristics seeding initial population
+    :param seed_share: share of initial population built from seeds and their perturbed copies
+    :param perturbation: share of libraries above split moved in perturbed copy of seed
+    :param target: stop as soon as the best score reaches target
+    :param initial: orderings placed into initial population (e.g. loaded results)
     :return:
     """
+    deadline = time() + time_limit if time_limit else None
     monitor = GracefulKiller()
-    p = Pool()
-    chunksize = min(1, size//(cpu_count() * 2))
-    population = p.map(chromosome_i_factory, [instance for _ in range(size)], chunksize=chunksize)
-    result = deepcopy(population[0])
-    cb = 0
-    for pop in population:
-            if pop.score > cb:
-                cb = pop.score
-            if pop.score > result.score:
-                result = deepcopy(pop)
-
-    print('Setup done')
-    for iteration in range(iterations):
-        start = time()
-        pre = p.starmap(tournament_and_crossover, [(population, k) for _ in range(size//2)], chunksize=chunksize)
-        population = flatten(pre)
-        population = p.starmap(mutate, [(pop, mutations) for pop in population], chunksize=chunksize)
-        # print(max(list(map(lambda x: x.score, population))))
+    set_instance(instance, engine)
+    with SharedInstance(instance) as shared, Pool(initializer=attach_worker, initargs=(shared.descriptor, engine)) as p:
+        tasks = cpu_count() * 2
+        first = 0
+        digest = instance_digest(instance) if snapshot is not None else None
+        if resume:
+            state = load_snapshot(snapshot)
+            if state['digest'] != digest:
+                raise ValueError('Snapshot {} does not match the instance'.format(snapshot))
+            population = [Chromosome(instance, order, evaluate=False) for order in state['orders']]
+            population = flatten(p.map(evaluated, split_tasks(population, tasks)))
+            result = Chromosome(instance, state['best_order'])
+            first = state['iteration']
+            setstate(state['random_state'])
+            size = len(population)
+            print('Resumed from iteration', first)
+        else:
+            population = seeded_population(size, seeds, seed_share, perturbation, p, tasks, initial)
+            result = population[0].copy()
         cb = 0
         for pop in population:
-            if pop.score > cb:
-                cb = pop.score
-            if pop.score > result.score:
-                result = deepcopy(pop)
-        print(iteration, result.score, cb, len(set(map(lambda x: x.score, population))), time() - start, sep='\t')
+                if pop.score > cb:
+                    cb = pop.score
+                if pop.score > result.score:
+                    result = pop.copy()
+
+        if checkpoint is not None:
+            checkpoint.update(result.libraries, result.score)
+
+        print('Setup done')
+        done = first
+        for iteration in (range(first, iterations) if iterations is not None else itertools.count(first)):
+            start = time()
+            parents = [(tournament(population, k), tournament(population, k)) for _ in range(size//2)]
+            pre = p.starmap(breed, [(task, mutations) for task in split_tasks(parents, tasks)])
+            population = flatten(pre)
+            # print(max(list(map(lambda x: x.score, population))))
+            cb = 0
+            best = result.score
+            for pop in population:
+                if pop.score > cb:
+                    cb = pop.score
+                if pop.score > result.score:
+                    result = pop.copy()
+            if checkpoint is not None and result.score > best:
+                checkpoint.update(result.libraries, result.score)
+            print(iteration, result.score, cb, len(set(map(lambda x: x.score, population))), time() - start, sep='\t')
+            done = iteration + 1
+            if snapshot is not None and snapshot_interval and done % snapshot_interval == 0:
+                save_population(snapshot, population, result, done, digest)
+
+            if monitor.kill_now or (target is not None and result.score >= target):
+                break
+            if deadline is not None and 2 * time() - start > deadline:  # next generation would not fit into the budget
+                break
+
+        if snapshot is not None:
+            save_population(snapshot, population, result, done, digest)
+        p.close()
+        p.join()
+    return result.libraries
+
+
+def save_population(filename: str, population: List[Chromosome], best: Chromosome, iteration: int, digest: bytes):
+    save_snapshot(filename, [c.order for c in population], [c.score for c in population], iteration,
+                  best.order, best.score, getstate(), digest)
 
-        if monitor.kill_now:
+
+def island(index: int, descriptor: Dict[str, Any], size: int, iterations: int, k: int, mutations: int,
+           interval: int, migrants: int, inbox: Queue, outbox: Queue, results: Queue, engine: str = 'python',
+           deadline: float = None, seeds: Sequence[str] = tuple(SEEDS), seed_share=0.5, perturbation=0.05,
+           target: int = None, initial: Sequence[Sequence[int]] = ()):
+    """
+    evolve single subpopulation, every interval generations send best migrants to the next island
+    and replace worst chromosomes with migrants received from the previous one,
+    best chromosome is reported to results as (False, chromosome) when it improves and (True, chromosome) at the end
+    """
+    monitor = GracefulKiller()
+    seed()
+    attach_worker(descriptor, engine)
+    outbox.cancel_join_thread()  # migrants left in the queue at the end can be dropped
+    population = seeded_population(size, seeds, seed_share, perturbation, initial=initial)
+    result = max(population, key=lambda x: x.score).copy()
+    reported = -1
+    for iteration in (range(iterations) if iterations is not None else itertools.count()):
+        start = time()
+        population = breed([(tournament(population, k), tournament(population, k)) for _ in range(size//2)], mutations)
+        population.sort(key=lambda x: x.score, reverse=True)
+        if population[0].score > result.score:
+            result = population[0].copy()
+
+        if (iteration + 1) % interval == 0:
+            outbox.put(population[:migrants])
+            while not inbox.empty():
+                incoming = inbox.get()
+                population[len(population) - len(incoming):] = incoming
+            if result.score > reported:
+                results.put((False, result))
+                reported = result.score
+            print(index, iteration, result.score, population[0].score, time() - start, sep='\t')
+
+        if monitor.kill_now or (target is not None and result.score >= target):
+            break
+        if deadline is not None and 2 * time() - start > deadline:  # next generation would not fit into the budget
             break
 
-    return result.libraries
-    
+    results.put((True, result))
+
+
+def genetic_islands(instance: Instance, islands=4, size=64, iterations=10, k=4, mutations=5, interval=5,
+                    migrants=2, engine='python', time_limit=None, checkpoint: Checkpointer = None,
+                    seeds: Sequence[str] = tuple(SEEDS), seed_share=0.5, perturbation=0.05,
+                    target: int = None, initial: Sequence[Sequence[int]] = ()) -> List[Tuple[int, Library]]:
+    """
+    island model genetic algorithm, each process evolves its own population
+    and exchanges best chromosomes with neighbours on a ring
+    :param instance: instance object
+    :param islands: number of islands (processes)
+    :param size: population size of single island
+    :param iterations: number of iterations
+    :param k: tournament size
+    :param interval: number of generations between migrations
+    :param migrants: number of chromosomes sent in single migration
+    :param engine: scoring engine, `python` or `numpy`
+    :param time_limit: wall-clock budget in seconds
+    :param checkpoint: checkpointer receiving improvements reported by islands
+    :param seeds: heuristics seeding initial population of every island
+    :param seed_share: share of island population built from seeds and their perturbed copies
+    :param perturbation: share of libraries above split moved in perturbed copy of seed
+    :param target: island stops as soon as its best score reaches target
+    :param initial: orderings placed into initial population of every island (e.g. loaded results)
+    :return:
+    """
+    deadline = time() + time_limit if time_limit else None
+    monitor = GracefulKiller()
+    set_instance(instance, engine)
+    with SharedInstance(instance) as shared:
+        queues = [Queue() for _ in range(islands)]
+        results = Queue()
+        processes = [
+            Process(target=island, args=(it, shared.descriptor, size, iterations, k, mutations, interval, migrants,
+                                         queues[it], queues[(it + 1) % islands], results, engine, deadline,
+                                         seeds, seed_share, perturbation, target, initial), daemon=True)
+            for it in range(islands)
+        ]
+        for process in processes:
+            process.start()
+        best = None
+        done = 0
+        dead = set()
+        while done + len(dead) < islands:
+            try:
+                final, result = results.get(timeout=1.0)
+            except Empty:
+                for it, process in enumerate(processes):
+                    if process.exitcode and it not in dead:  # crashed without reporting final result
+                        print('Warning: island', it, 'died with exit code', process.exitcode)
+                        dead.add(it)
+                continue
+            done += final
+            if best is None or result.score > best.score:
+                best = result
+                if checkpoint is not None:
+                    checkpoint.update(best.libraries, best.score)
+        for process in processes:
+            process.join()
+    if best is None:
+        raise RuntimeError('All islands died without result')
+    if monitor.kill_now:
+        print('Interrupted')
+    return best.libraries
+
 
 if __name__ == '__main__':
 
@@ -212,13 +537,45 @@ if __name__ == '__main__':
         help='Select instance to compute')
     parser.add_argument('-s', '--size', type=int, default=32, metavar='s', 
         help='Population size')
-    parser.add_argument('-i', '--iterations', type=int, default=20, metavar='i', 
-        help='Number of iterations')
+    parser.add_argument('-i', '--iterations', type=int, default=None, metavar='i',
+        help='Number of iterations (20 by default, unlimited if time limit is given)')
+    parser.add_argument('-t', '--time-limit', type=float, default=None, metavar='t',
+        help='Wall-clock budget in seconds')
+    parser.add_argument('-c', '--checkpoint-interval', type=float, default=60.0, metavar='c',
+        help='Seconds between checkpoints of the best solution to output file')
     parser.add_argument('-k', '--tournament-size', type=int, default=4, metavar='k',
         help='Size of tournament')
     parser.add_argument('-m', '--mutations-count', type=int,  default=5, metavar='m',
         help='Number of attempts to mutate single element in the population in each iteration')
+    parser.add_argument('-n', '--islands', type=int, default=0, metavar='n',
+        help='Number of islands evolved in separate processes, population size is then per island (0 - single population)')
+    parser.add_argument('--migration-interval', type=int, default=5, metavar='g',
+        help='Number of generations between migrations of island model')
+    parser.add_argument('--migration-size', type=int, default=2, metavar='c',
+        help='Number of best chromosomes sent to neighbour island in single migration')
+    parser.add_argument('-e', '--engine', type=str, choices=['python', 'numpy'], default='python',
+        help='Scoring engine of chromosomes')
+    parser.add_argument('--snapshot-interval', type=int, default=10, metavar='g',
+        help='Number of iterations between population snapshots (snapshot is also saved at the end), 0 - only at the end')
+    parser.add_argument('-r', '--resume', action='store_true',
+        help='Continue from saved population snapshot (single population mode only)')
+    parser.add_argument('--seeds', type=str, nargs='*', choices=list(SEEDS), default=list(SEEDS),
+        help='Heuristics seeding initial population (all by default)')
+    parser.add_argument('--seed-share', type=float, default=0.5, metavar='x',
+        help='Share of initial population built from seeds and their perturbed copies, the rest is random')
+    parser.add_argument('--perturbation', type=float, default=0.05, metavar='x',
+        help='Share of libraries above split moved in perturbed copy of seed')
+    parser.add_argument('-P', '--prune', action='store_true',
+        help='Remove dead, empty and dominated libraries and zero score books before solving')
+    parser.add_argument('-g', '--gap', type=float, default=None, metavar='g',
+        help='Stop when the best solution is within this relative gap from the upper bound')
+    parser.add_argument('-z', '--gzip', action='store_true',
+        help='Write gzip compressed output file')
+    parser.add_argument('-l', '--load', type=str, nargs='+', default=[], metavar='file',
+        help='Result files placed into initial population')
     args = parser.parse_args()
+    if args.resume and args.islands:
+        parser.error('--resume is supported in single population mode only')
 
     index = ord(args.instance) - ord('a')
 
@@ -231,14 +588,41 @@ if __name__ == '__main__':
     file = files[index]
     print(file)
 
-    i = Instance('input/' + file)
+    i = load_instance('input/' + file)
+    pruned = None
+    if args.prune:
+        pruned = prune(i)
+        pruned.print_report()
+        i = pruned.instance
     print(i.num_books)
     print(score(i.libraries, i.days, verbose=False))
     print('--------')
 
-    r = genetic(i, size=args.size, iterations=args.iterations, k=args.tournament_size, mutations=args.mutations_count)
+    upper = upper_bounds(i)['bound']
+    goal = target_score(upper, args.gap) if args.gap is not None else None
+    library_ids = pruned.library_ids if pruned is not None else None
+    initial = [load_ordering(filename, i.num_libraries, library_ids) for filename in args.load]
+    output = 'output/' + file[0] + '_genetic.out' + ('.gz' if args.gzip else '')
+    snapshot = 'output/' + file[0] + ('_genetic_pruned' if args.prune else '_genetic') + '.snapshot'
+    iterations = args.iterations if args.iterations is not None or args.time_limit else 20
+    checkpoint = Checkpointer(output, i.days, args.checkpoint_interval, library_ids, args.gzip)
+    if args.islands:
+        r = genetic_islands(i, islands=args.islands, size=args.size, iterations=iterations, k=args.tournament_size,
+                            mutations=args.mutations_count, interval=args.migration_interval,
+                            migrants=args.migration_size, engine=args.engine, time_limit=args.time_limit,
+                            checkpoint=checkpoint, seeds=args.seeds, seed_share=args.seed_share,
+                            perturbation=args.perturbation, target=goal, initial=initial)
+    else:
+        r = genetic(i, size=args.size, iterations=iterations, k=args.tournament_size, mutations=args.mutations_count,
+                    engine=args.engine, time_limit=args.time_limit, checkpoint=checkpoint,
+                    snapshot=snapshot, snapshot_interval=args.snapshot_interval,
+                    resume=args.resume, seeds=args.seeds, seed_share=args.seed_share,
+                    perturbation=args.perturbation, target=goal, initial=initial)
+    checkpoint.close()
 
     print('--------')
-    print(score(r, i.days, verbose=False))
-    save_result(transform_result(r, i.days), 'output/' + file[0] + '_genetic.out')
+    sc = score(r, i.days, verbose=False)
+    print(sc)
+    print_gap(sc, upper)
+    save_stream(r, i.days, output, library_ids=library_ids, compress=args.gzip)
     print('Result saved. Done.')
@@ -0,0 +1,183 @@
+from typing import List, Tuple, Callable, Dict, Sequence
+from array import array
+from heapq import heapify, heappop, heappush
+from itertools import accumulate
+from multiprocessing import Pool
+import argparse
+from cache import load_instance
+from common import Instance, Library, score, save_atomic, transform_result
+from bounds import upper_bounds, print_gap
+
+
+def prefix_sums(instance: Instance, values: Sequence[float] = None) -> Sequence[float]:
+    """
+    prefix sums of book values of every library in the layout of Instance.prefix,
+    value of top k books of library i is prefix[offsets[i] + i + k]
+    :param values: value of every book, book scores by default (prefix sums built at instance load)
+    """
+    if values is None:
+        return instance.prefix
+    prefix = array('d')
+    books, offsets = instance.books, instance.offsets
+    for i in range(instance.num_libraries):
+        prefix.append(0)
+        prefix.extend(accumulate(map(values.__getitem__, books[offsets[i]:offsets[i + 1]])))
+    return prefix
+
+
+def rarity_values(instance: Instance) -> List[float]:
+    """
+    book score divided by number of libraries competing for it
+    """
+    return [sc / max(1, freq) for sc, freq in zip(instance.scoring, instance.frequencies())]
+
+
+def capacity(instance: Instance, i: int, days: int) -> int:
+    """
+    number of books library i scans when signed up with `days` remaining, ignoring overlap
+    """
+    return min(instance.offsets[i + 1] - instance.offsets[i], max(0, days - instance.signup[i]) * instance.per_day[i])
+
+
+def top_value(instance: Instance, prefix: Sequence[float], i: int, k: int) -> float:
+    return prefix[instance.offsets[i] + i + k]
+
+
+def ratio_order(instance: Instance, prefix: Sequence[float], days: int = None) -> List[int]:
+    """
+    libraries sorted by value of books scanned in `days` (all books if None) per signup day
+    """
+    if days is None:
+        offsets = instance.offsets
+        key = [prefix[offsets[i + 1] + i] / max(1, instance.signup[i]) for i in range(instance.num_libraries)]
+    else:
+        key = [top_value(instance, prefix, i, capacity(instance, i, days)) / max(1, instance.signup[i])
+               for i in range(instance.num_libraries)]
+    return sorted(range(instance.num_libraries), key=key.__getitem__, reverse=True)
+
+
+def remaining_order(instance: Instance, prefix: Sequence[float]) -> List[int]:
+    """
+    libraries chosen one by one by value per signup day recomputed against remaining days,
+    value can only decrease with less days, so it is recomputed lazily for the top library only
+    libraries with nothing left to scan are omitted
+    """
+    start = 0
+    order = []
+    heap = [(-top_value(instance, prefix, i, capacity(instance, i, instance.days)) / max(1, instance.signup[i]), i, 0)
+            for i in range(instance.num_libraries)]
+    heapify(heap)
+    while heap and start < instance.days:
+        value, i, computed = heappop(heap)
+        if computed != start:
+            k = capacity(instance, i, instance.days - start)
+            heappush(heap, (-top_value(instance, prefix, i, k) / max(1, instance.signup[i]), i, start))
+            continue
+        if not value:
+            break
+        order.append(i)
+        start += instance.signup[i]
+    return order
+
+
+def by_score_per_signup_day(instance: Instance) -> List[Tuple[int, Library]]:
+    """
+    sum of book scores per signup day
+    """
+    libraries = instance.libraries
+    return [libraries[i] for i in ratio_order(instance, prefix_sums(instance))]
+
+
+def by_capacity_value(instance: Instance) -> List[Tuple[int, Library]]:
+    """
+    sum of top days * per_day books per signup day
+    """
+    libraries = instance.libraries
+    return [libraries[i] for i in ratio_order(instance, prefix_sums(instance), instance.days)]
+
+
+def by_rarity_value(instance: Instance) -> List[Tuple[int, Library]]:
+    """
+    capacity value with book scores divided by number of libraries owning the book
+    """
+    libraries = instance.libraries
+    return [libraries[i] for i in ratio_order(instance, prefix_sums(instance, rarity_values(instance)), instance.days)]
+
+
+def by_remaining_capacity_value(instance: Instance) -> List[Tuple[int, Library]]:
+    libraries = instance.libraries
+    return [libraries[i] for i in remaining_order(instance, prefix_sums(instance))]
+
+
+def by_remaining_rarity_value(instance: Instance) -> List[Tuple[int, Library]]:
+    libraries = instance.libraries
+    return [libraries[i] for i in remaining_order(instance, prefix_sums(instance, rarity_values(instance)))]
+
+
+HEURISTICS: Dict[str, Callable[[Instance], List[Tuple[int, Library]]]] = {
+    'ratio': by_score_per_signup_day,
+    'capacity': by_capacity_value,
+    'rarity': by_rarity_value,
+    'remaining': by_remaining_capacity_value,
+    'remaining_rarity': by_remaining_rarity_value,
+}
+
+_instance = None
+
+
+def set_instance(instance: Instance):
+    global _instance
+    _instance = instance
+
+
+def run(name: str) -> Tuple[str, List[int], int]:
+    """
+    portfolio task - run single heuristic on instance of the process
+    :return: name, ordering and score
+    """
+    libraries = HEURISTICS[name](_instance)
+    return name, [it for it, _ in libraries], score(libraries, _instance.days, verbose=False)
+
+
+def portfolio(instance: Instance, names: Sequence[str] = tuple(HEURISTICS), processes: int = None) \
+        -> List[Tuple[str, List[int], int]]:
+    """
+    run heuristics in parallel, results are sorted by score desc
+    """
+    with Pool(processes, initializer=set_instance, initargs=(instance,)) as p:
+        results = p.map(run, names)
+    results.sort(key=lambda x: x[2], reverse=True)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Portfolio of ratio and marginal value heuristics, best result is saved")
+    parser.add_argument('instance', type=str, choices=['a', 'b', 'c', 'd', 'e', 'f'],
+        help='Select instance to compute')
+    parser.add_argument('-H', '--heuristics', type=str, nargs='+', choices=list(HEURISTICS), default=list(HEURISTICS),
+        help='Heuristics to run (all by default)')
+    parser.add_argument('-p', '--processes', type=int, default=None,
+        help='Number of processes (number of CPUs by default)')
+    args = parser.parse_args()
+
+    index = ord(args.instance) - ord('a')
+
+    files = ['a_example.txt',
+             'b_read_on.txt',
+             'c_incunabula.txt',
+             'd_tough_choices.txt',
+             'e_so_many_books.txt',
+             'f_libraries_of_the_world.txt']
+    file = files[index]
+    print(file)
+
+    i = load_instance('input/' + file)
+    results = portfolio(i, args.heuristics, args.processes)
+    for name, _, sc in results:
+        print(name, sc, sep='\t')
+
+    name, order, sc = results[0]
+    save_atomic(transform_result([i.libraries[it] for it in order], i.days), 'output/' + file[0] + '_heuristics.out')
+    print('Best:', name, sc)
+    print_gap(sc, upper_bounds(i)['bound'])
+    print('Result saved. Done.')
@@ -0,0 +1,197 @@
+from typing import List, Tuple, Sequence
+from random import random, randrange, choice
+from math import log
+from time import time
+import argparse
+from cache import load_instance
+from common import Instance, Library, score, save_stream, load_ordering, GracefulKiller, Checkpointer
+from evaluator import Evaluator
+from main import basic
+from pruning import prune
+from bounds import upper_bounds, target_score, print_gap
+
+
+def complete_order(instance: Instance, libraries: List[Tuple[int, Library]]) -> List[int]:
+    """
+    ordering of all libraries starting with given libraries, the rest is appended in index order
+    """
+    order = [it for it, _ in libraries]
+    used = set(order)
+    order.extend(it for it in range(instance.num_libraries) if it not in used)
+    return order
+
+
+def random_move(evaluator: Evaluator) -> Tuple[str, int, int]:
+    """
+    swap - two libraries above split, insert - move any library to position at most split,
+    replace - swap library above split with one below split
+    """
+    n = len(evaluator.order)
+    split = evaluator.split
+    kind = choice(('swap', 'insert', 'replace'))
+    if kind == 'replace' and split < n:
+        return kind, randrange(0, split), randrange(split, n)
+    if kind == 'insert':
+        return kind, randrange(0, n), randrange(0, min(split + 1, n))
+    return 'swap', randrange(0, split), randrange(0, split)
+
+
+def evaluate(evaluator: Evaluator, move: Tuple[str, int, int]) -> int:
+    kind, a, b = move
+    if kind == 'insert':
+        return evaluator.evaluate_move(a, b)
+    return evaluator.evaluate_swap(a, b)
+
+
+def apply(evaluator: Evaluator, move: Tuple[str, int, int]) -> int:
+    kind, a, b = move
+    if kind == 'insert':
+        return evaluator.move(a, b)
+    return evaluator.swap(a, b)
+
+
+def estimate_temperature(evaluator: Evaluator, samples: int = 100) -> float:
+    """
+    mean absolute score change of random moves
+    """
+    deltas = []
+    for _ in range(samples):
+        delta = abs(evaluate(evaluator, random_move(evaluator)) - evaluator.score)
+        if delta:
+            deltas.append(delta)
+    return sum(deltas) / len(deltas) if deltas else 1.0
+
+
+def local_search(instance: Instance, order: Sequence[int] = None, time_limit: float = 60.0, method: str = 'sa',
+                 temperature: float = None, final_temperature: float = None, history: int = 1000,
+                 verbose: bool = True, checkpoint: Checkpointer = None, target: int = None) -> List[Tuple[int, Library]]:
+    """
+    local search on library ordering with swap, insert and replace moves
+    every move is scored incrementally by evaluator
+    :param instance: instance object
+    :param order: starting ordering of library indices, result of basic heuristic by default
+    :param time_limit: time budget in seconds
+    :param method: `sa` - simulated annealing, `lahc` - late acceptance hill climbing
+    :param temperature: starting temperature of annealing, estimated from random moves by default
+    :param final_temperature: temperature at the end of time budget, 1/1000 of starting one by default
+    :param history: history length of late acceptance hill climbing
+    :param checkpoint: checkpointer receiving improvements of the best solution
+    :param target: stop as soon as the best score reaches target
+    :return: best ordering found
+    """
+    monitor = GracefulKiller()
+    if order is None:
+        order = complete_order(instance, basic(instance))
+    evaluator = Evaluator(instance.libraries, instance.days, order)
+    best_score = evaluator.score
+    best_order = evaluator.order.copy()
+    if evaluator.split == 0:
+        return evaluator.ordering()
+
+    if temperature is None:
+        temperature = estimate_temperature(evaluator)
+    if final_temperature is None:
+        final_temperature = temperature / 1000
+    late = [evaluator.score] * history
+    libraries = instance.libraries
+    checkpointed = -1
+
+    start = time()
+    deadline = start + time_limit
+    t = temperature
+    iteration = 0
+    accepted = 0
+    while True:
+        if iteration % 64 == 0:
+            now = time()
+            if now >= deadline or monitor.kill_now or (target is not None and best_score >= target):
+                break
+            t = temperature * (final_temperature / temperature) ** ((now - start) / time_limit)
+            if checkpoint is not None and best_score > checkpointed:
+                checkpoint.update([libraries[it] for it in best_order], best_score)
+                checkpointed = best_score
+            if verbose and iteration % (64 * 256) == 0:
+                print(iteration, round(now - start, 1), best_score, evaluator.score, accepted, sep='\t')
+
+        current = evaluator.score
+        if method == 'lahc':
+            threshold = min(current, late[iteration % history])
+        else:
+            threshold = current + t * log(1.0 - random())
+        iteration += 1
+
+        move = random_move(evaluator)
+        if evaluate(evaluator, move) >= threshold:
+            apply(evaluator, move)
+            accepted += 1
+            if evaluator.score > best_score:
+                best_score = evaluator.score
+                best_order = evaluator.order.copy()
+        if method == 'lahc':
+            # history is written every iteration, rejected moves included
+            late[(iteration - 1) % history] = evaluator.score
+
+    if verbose:
+        print(iteration, round(time() - start, 1), best_score, evaluator.score, accepted, sep='\t')
+    return [libraries[it] for it in best_order]
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Local search to solve problem from round 1 of Google Hashcode 2020 competition")
+    parser.add_argument('instance', type=str, choices=['a', 'b', 'c', 'd', 'e', 'f'],
+        help='Select instance to compute')
+    parser.add_argument('-t', '--time-limit', type=float, default=60.0, metavar='t',
+        help='Time budget in seconds')
+    parser.add_argument('-m', '--method', type=str, choices=['sa', 'lahc'], default='sa',
+        help='Simulated annealing or late acceptance hill climbing')
+    parser.add_argument('--temperature', type=float, default=None,
+        help='Starting temperature of simulated annealing (estimated by default)')
+    parser.add_argument('--history', type=int, default=1000,
+        help='History length of late acceptance hill climbing')
+    parser.add_argument('-c', '--checkpoint-interval', type=float, default=60.0, metavar='c',
+        help='Seconds between checkpoints of the best solution to output file')
+    parser.add_argument('-P', '--prune', action='store_true',
+        help='Remove dead, empty and dominated libraries and zero score books before solving')
+    parser.add_argument('-g', '--gap', type=float, default=None, metavar='g',
+        help='Stop when the best solution is within this relative gap from the upper bound')
+    parser.add_argument('-z', '--gzip', action='store_true',
+        help='Write gzip compressed output file')
+    parser.add_argument('-l', '--load', type=str, default=None, metavar='file',
+        help='Result file to start from (result of basic heuristic by default)')
+    args = parser.parse_args()
+
+    index = ord(args.instance) - ord('a')
+
+    files = ['a_example.txt',
+             'b_read_on.txt',
+             'c_incunabula.txt',
+             'd_tough_choices.txt',
+             'e_so_many_books.txt',
+             'f_libraries_of_the_world.txt']
+    file = files[index]
+    print(file)
+
+    i = load_instance('input/' + file)
+    pruned = None
+    if args.prune:
+        pruned = prune(i)
+        pruned.print_report()
+        i = pruned.instance
+
+    upper = upper_bounds(i)['bound']
+    output = 'output/' + file[0] + '_local.out' + ('.gz' if args.gzip else '')
+    library_ids = pruned.library_ids if pruned is not None else None
+    order = load_ordering(args.load, i.num_libraries, library_ids) if args.load else None
+    checkpoint = Checkpointer(output, i.days, args.checkpoint_interval, library_ids, args.gzip)
+    r = local_search(i, order, time_limit=args.time_limit, method=args.method, temperature=args.temperature,
+                     history=args.history, checkpoint=checkpoint,
+                     target=target_score(upper, args.gap) if args.gap is not None else None)
+    checkpoint.close()
+
+    print('--------')
+    sc = score(r, i.days, verbose=False)
+    print(sc)
+    print_gap(sc, upper)
+    save_stream(r, i.days, output, library_ids=library_ids, compress=args.gzip)
+    print('Result saved. Done.')
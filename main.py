@@ -1,50 +1,46 @@
-from multiprocessing import Pool
 from typing import List, Tuple
-from common import Library, Instance, save_result, transform_result, score, get_scanable_books
+from heapq import heapify, heappop, heappush
+from common import Library, Instance, save_result, transform_result, score, get_scanable_books, scanned_mask, \
+    mark_scanned, books_score, load_ordering
 import argparse
+from cache import load_instance
+from vectorized import NumpyScorer
+from bounds import upper_bounds, print_gap
 from sortings import sort_by_num_books_desc, sort_by_sum_book_scores_desc, sort_by_setup_time_asc, sort_by_perday_desc
 
 
 def basic(instance: Instance) -> List[Tuple[int, Library]]:
     """
-    Basic `sophisticated` heuristic approach.
-    Works fast except instance D
+    Basic `sophisticated` heuristic approach - sign up library with the best gain in every step.
+    Lazy greedy version: gain of library can only decrease in time (less days, more books scanned),
+    so libraries are kept in a heap keyed by last computed gain and only the top one is recomputed.
     :param instance:
     :return:
     """
     ranking = []
     start = 0
-    books_scanned = set()
-    libraries_signed = list()
-    while start < instance.days:
-        lib_rank = []
-        did_change = False
-        for it, library in instance.libraries:
-            if it in libraries_signed:
-                continue
-            if start + library.signup >= instance.days:
-                continue
-            did_change = True
-
+    step = 0
+    books_scanned = scanned_mask(instance.libraries)
+    heap = [(-library.top_value(library.number_of_books), it, -1) for it, library in instance.libraries]
+    heapify(heap)
+    while heap and start < instance.days:
+        gain, it, computed = heappop(heap)
+        library = instance.libraries[it][1]
+        if start + library.signup >= instance.days:
+            continue
+        if computed != step:
             books = get_scanable_books(library, instance.days, start, books_scanned)
-            sc = sum(list(map(lambda x: x[1], books)))
-
-            lib_rank.append((it, sc))
-
-        if not did_change:
-            print('No change done')
+            heappush(heap, (-books_score(library, books), it, step))
+            continue
+        if not gain:
             break
 
-        lib_rank.sort(key=lambda x: x[1], reverse=True)
-
-        chosen = instance.libraries[lib_rank[0][0]]
-
-        temp_books = get_scanable_books(chosen[1], instance.days, start, books_scanned)
-        books_scanned = books_scanned.union(set(temp_books))
+        temp_books = get_scanable_books(library, instance.days, start, books_scanned)
+        mark_scanned(temp_books, books_scanned)
 
-        start += chosen[1].signup
-        ranking.append(chosen)
-        libraries_signed.append(lib_rank[0][0])
+        start += library.signup
+        step += 1
+        ranking.append(instance.libraries[it])
 
     return ranking
 
@@ -67,23 +63,38 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="Basic algorithm to solve problem from round 1 of Google Hashcode 2020 competition")
     parser.add_argument('instance', type=str, choices=['a', 'b', 'c', 'd', 'e', 'f'], 
         help='Select instance to compute')
+    parser.add_argument('-e', '--engine', type=str, choices=['python', 'numpy'], default='python',
+        help='Scoring engine, numpy engine prints score only')
+    parser.add_argument('-l', '--load', type=str, nargs='+', default=[], metavar='file',
+        help='Result files scored together with sortings')
     args = parser.parse_args()
 
     index = ord(args.instance) - ord('a')
 
     file = files[index]
 
-    i = Instance('input/' + file)
+    i = load_instance('input/' + file)
 
     r1 = sort_by_sum_book_scores_desc(i.libraries)
     r2 = sort_by_num_books_desc(i.libraries)
     r3 = sort_by_setup_time_asc(i.libraries)
     r4 = sort_by_perday_desc(i.libraries)
 
-    print("Sum of books desc:\t", score(r1,i.days, i.num_books, i.num_libraries))
-    print("Number of books desc:\t", score(r2,i.days, i.num_books, i.num_libraries))
-    print("Setup time asc:\t", score(r3,i.days, i.num_books,i.num_libraries))
-    print("Perday desc:\t", score(r4, i.days, i.num_books, i.num_libraries))
+    if args.engine == 'numpy':
+        scorer = NumpyScorer(i)
+        evaluate = lambda r: scorer.score([it for it, _ in r])
+    else:
+        evaluate = lambda r: score(r, i.days, i.num_books, i.num_libraries)
+
+    scores = []
+    for name, r in (("Sum of books desc", r1), ("Number of books desc", r2), ("Setup time asc", r3),
+                    ("Perday desc", r4)):
+        scores.append(evaluate(r))
+        print(name + ":\t", scores[-1])
+    for filename in args.load:
+        scores.append(evaluate([i.libraries[it] for it in load_ordering(filename, i.num_libraries)]))
+        print(filename + ":\t", scores[-1])
+    print_gap(max(scores), upper_bounds(i)['bound'])
 
     # print(score(r, i.days, i.num_books, i.num_libraries))
     
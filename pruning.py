@@ -0,0 +1,102 @@
+from typing import List, Tuple, Dict
+from array import array
+from common import Instance
+
+
+class Pruned:
+    """
+    Instance without libraries and books which can never contribute to the score,
+    library i of pruned instance is library library_ids[i] of the original one, book ids are kept
+    """
+
+    def __init__(self, instance: Instance, library_ids: array, report: Dict[str, int]):
+        self.instance = instance
+        self.library_ids = library_ids
+        self.report = report
+
+    def original(self, result: List[Tuple[int, List[int]]]) -> List[Tuple[int, List[int]]]:
+        """
+        Map result of transform_result on pruned instance to original library ids, ready for save_result
+        """
+        return [(self.library_ids[i], books) for i, books in result]
+
+    def print_report(self):
+        report = self.report
+        print('Pruned libraries:\t', report['libraries'] - report['libraries_left'], 'of', report['libraries'],
+              '(dead:', report['dead'], 'empty:', report['empty'], 'dominated:', str(report['dominated']) + ')')
+        print('Pruned book entries:\t', report['entries'] - report['entries_left'], 'of', report['entries'],
+              '(zero score books:', str(report['zero_books']) + ')')
+
+
+def positive_counts(instance: Instance) -> array:
+    """
+    number of books with positive score of every library, they are at the front of score sorted books
+    """
+    scoring = instance.scoring
+    counts = array('q')
+    for i in range(instance.num_libraries):
+        counts.append(sum(1 for book in instance.library_books(i) if scoring[book] > 0))
+    return counts
+
+
+def dominated_by(instance: Instance, i: int, counts: array, removed: bytearray) -> int:
+    """
+    library j != i which makes library i useless, -1 if there is none
+    j holds all positive books of i, signs up not slower and scans all its positive books from any start
+    at which i is still able to scan (the latest one is days - signup[i] - 1),
+    so placing j instead of i never loses score and i after j never gains any
+    """
+    signup, per_day = instance.signup, instance.per_day
+    books = instance.library_books(i)[:counts[i]]
+    rarest = min(books, key=instance.frequency)
+    candidates = [j for j in instance.book_holders(rarest)
+                  if j != i and not removed[j] and signup[j] <= signup[i]
+                  and (signup[i] + 1 - signup[j]) * per_day[j] >= counts[j]]
+    for book in books:
+        if not candidates:
+            return -1
+        if book != rarest:
+            holders = set(instance.book_holders(book))
+            candidates = [j for j in candidates if j in holders]
+    return candidates[0] if candidates else -1
+
+
+def prune(instance: Instance, dominated: bool = True) -> Pruned:
+    """
+    Remove dead libraries (signup not shorter than days), zero score books, libraries left without books
+    and libraries dominated by other library
+    :param dominated: search for dominated libraries (uses inverted index, slowest part)
+    """
+    days = instance.days
+    counts = positive_counts(instance)
+    removed = bytearray(instance.num_libraries)
+    report = {'libraries': instance.num_libraries, 'dead': 0, 'empty': 0, 'dominated': 0,
+              'entries': len(instance.books),
+              'zero_books': sum(1 for sc in instance.scoring if sc <= 0)}
+    for i in range(instance.num_libraries):
+        if instance.signup[i] >= days:
+            removed[i] = 1
+            report['dead'] += 1
+        elif not counts[i]:
+            removed[i] = 1
+            report['empty'] += 1
+    if dominated:
+        for i in range(instance.num_libraries):
+            if not removed[i] and dominated_by(instance, i, counts, removed) >= 0:
+                removed[i] = 1
+                report['dominated'] += 1
+
+    library_ids = array('i', (i for i in range(instance.num_libraries) if not removed[i]))
+    signup, per_day, books, prefix = array('i'), array('i'), array('i'), array('q')
+    offsets = array('q', [0])
+    for i in library_ids:
+        signup.append(instance.signup[i])
+        per_day.append(instance.per_day[i])
+        books.extend(instance.library_books(i)[:counts[i]])
+        offsets.append(len(books))
+        prefix.extend(instance.library_prefix(i)[:counts[i] + 1])
+    pruned = Instance.from_arrays(instance.num_books, len(library_ids), days, scoring=instance.scoring,
+                                  signup=signup, per_day=per_day, offsets=offsets, books=books, prefix=prefix)
+    report['libraries_left'] = len(library_ids)
+    report['entries_left'] = len(books)
+    return Pruned(pruned, library_ids, report)
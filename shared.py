@@ -0,0 +1,54 @@
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict
+from common import Instance
+
+
+class SharedInstance:
+    """
+    Instance arrays copied once into shared memory
+    workers attach them by name with attach_instance(descriptor), no copy and no pickling of the arrays
+    """
+
+    def __init__(self, instance: Instance):
+        self.blocks = []
+        arrays = {}
+        for name in Instance.arrays:
+            arr = getattr(instance, name)
+            data = memoryview(arr).cast('B')
+            block = SharedMemory(create=True, size=max(1, len(data)))
+            block.buf[:len(data)] = data
+            self.blocks.append(block)
+            arrays[name] = (block.name, memoryview(arr).format, len(data))
+        self.descriptor = {
+            'num_books': instance.num_books,
+            'num_libraries': instance.num_libraries,
+            'days': instance.days,
+            'arrays': arrays
+        }
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self) -> 'SharedInstance':
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def attach_instance(descriptor: Dict[str, Any]) -> Instance:
+    """
+    Instance backed by shared memory blocks created by SharedInstance
+    """
+    blocks = []
+    arrays = {}
+    for name, (block_name, typecode, size) in descriptor['arrays'].items():
+        block = SharedMemory(name=block_name)
+        blocks.append(block)
+        arrays[name] = block.buf[:size].cast(typecode)
+    instance = Instance.from_arrays(descriptor['num_books'], descriptor['num_libraries'], descriptor['days'], **arrays)
+    instance.blocks = blocks  # keep shared memory mapped as long as instance lives
+    return instance
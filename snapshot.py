@@ -0,0 +1,70 @@
+from typing import List, Sequence, Dict, Any
+from array import array
+import hashlib
+import pickle
+import struct
+from common import Instance, atomic_write
+
+MAGIC = b'HCGA'
+VERSION = 2
+# magic, version, population size, ordering length, iteration, best score, length of pickled random state,
+# digest of instance
+HEADER = struct.Struct('<4sIIIqqI20s')
+
+
+def instance_digest(instance: Instance) -> bytes:
+    """
+    sha1 of days and book and library arrays, pruned instance has different digest than the original one
+    """
+    digest = hashlib.sha1(struct.pack('<qqq', instance.num_books, instance.num_libraries, instance.days))
+    for name in ('scoring', 'signup', 'per_day', 'offsets', 'books'):
+        digest.update(array('q', getattr(instance, name)).tobytes())
+    return digest.digest()
+
+
+def save_snapshot(filename: str, orders: Sequence[Sequence[int]], scores: Sequence[int], iteration: int,
+                  best_order: Sequence[int], best_score: int, random_state: Any, digest: bytes):
+    """
+    Save population as compact binary snapshot, file is replaced atomically
+    layout: header, pickled random state, scores (int64), best ordering and all orderings (int32)
+    :param digest: instance_digest of the solved instance, checked on resume
+    """
+    state = pickle.dumps(random_state)
+    with atomic_write(filename) as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(orders), len(best_order), iteration, best_score, len(state),
+                            digest))
+        f.write(state)
+        f.write(array('q', scores).tobytes())
+        f.write(array('i', best_order).tobytes())
+        for order in orders:
+            f.write(array('i', order).tobytes())
+
+
+def load_snapshot(filename: str) -> Dict[str, Any]:
+    """
+    :return: dict with orders, scores, iteration, best_order, best_score, random_state and digest
+    """
+    with open(filename, 'rb') as f:
+        magic, version, size, length, iteration, best_score, state_length, digest = \
+            HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('{} is not a population snapshot'.format(filename))
+        random_state = pickle.loads(f.read(state_length))
+        scores = array('q')
+        scores.frombytes(f.read(8 * size))
+        best_order = array('i')
+        best_order.frombytes(f.read(4 * length))
+        orders: List[array] = []
+        for _ in range(size):
+            order = array('i')
+            order.frombytes(f.read(4 * length))
+            orders.append(order)
+    return {
+        'orders': orders,
+        'scores': scores.tolist(),
+        'iteration': iteration,
+        'best_order': best_order,
+        'best_score': best_score,
+        'random_state': random_state,
+        'digest': digest
+    }
@@ -17,7 +17,7 @@ def sort_by_num_books_desc(libraries: List[Tuple[int, Library]]) -> List[Tuple[i
 
 def sort_by_sum_book_scores_desc(libraries: List[Tuple[int, Library]]) -> List[Tuple[int, Library]]:
     libraries = libraries.copy()
-    libraries.sort(key=lambda x: sum(list(map(lambda y: y[1], x[1].books))), reverse=True)
+    libraries.sort(key=lambda x: x[1].top_value(x[1].number_of_books), reverse=True)
 
     return libraries
 
@@ -25,4 +25,10 @@ def sort_by_perday_desc(libraries: List[Tuple[int, Library]]) -> List[Tuple[int,
     libraries = libraries.copy()
     libraries.sort(key=lambda x: x[1].per_day, reverse=True)
 
-    return libraries
\ No newline at end of file
+    return libraries
+
+def sort_by_throughput_desc(libraries: List[Tuple[int, Library]]) -> List[Tuple[int, Library]]:
+    libraries = libraries.copy()
+    libraries.sort(key=lambda x: x[1].per_day / max(1, x[1].signup), reverse=True)
+
+    return libraries
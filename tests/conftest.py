@@ -0,0 +1,32 @@
+import os
+import sys
+from random import Random
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common import Instance  # noqa: E402
+
+
+def write_random_instance(filename: str, seed: int, books: int, libraries: int, days: int, max_books: int = 8,
+                          max_signup: int = 4, max_per_day: int = 3):
+    rnd = Random(seed)
+    with open(filename, 'w') as f:
+        f.write('{} {} {}\n'.format(books, libraries, days))
+        f.write(' '.join(str(rnd.randint(0, 20)) for _ in range(books)) + '\n')
+        for _ in range(libraries):
+            ids = rnd.sample(range(books), rnd.randint(1, min(max_books, books)))
+            f.write('{} {} {}\n'.format(len(ids), rnd.randint(1, max_signup), rnd.randint(1, max_per_day)))
+            f.write(' '.join(map(str, ids)) + '\n')
+
+
+@pytest.fixture
+def random_instance(tmp_path):
+    """
+    factory of small random instances written as text files, overlapping books and tight days
+    """
+    def factory(seed: int, books: int = 30, libraries: int = 12, days: int = 15, **kwargs) -> Instance:
+        filename = str(tmp_path / 'instance_{}.txt'.format(seed))
+        write_random_instance(filename, seed, books, libraries, days, **kwargs)
+        return Instance(filename)
+    return factory
@@ -0,0 +1,36 @@
+from itertools import product
+from random import Random
+import pytest
+from assignment import assign_books, capacities
+
+
+def brute_force(instance, order):
+    """
+    best total score over all assignments of every book to one of its libraries in order or to none
+    """
+    free = capacities(instance, order)
+    books = sorted({book for it in order for book in instance.library_books(it)})
+    options = [[-1] + [pos for pos, it in enumerate(order) if book in instance.library_books(it)] for book in books]
+    best = 0
+    for choice in product(*options):
+        used = [0] * len(order)
+        for pos in choice:
+            if pos >= 0:
+                used[pos] += 1
+        if all(u <= f for u, f in zip(used, free)):
+            best = max(best, sum(instance.scoring[book] for book, pos in zip(books, choice) if pos >= 0))
+    return best
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_assign_books_is_optimal(random_instance, seed):
+    instance = random_instance(seed, books=9, libraries=4, days=6, max_books=5, max_signup=2, max_per_day=2)
+    order = list(range(instance.num_libraries))
+    Random(seed).shuffle(order)
+    assigned = assign_books(instance, order)
+    for it, books, free in zip(order, assigned, capacities(instance, order)):
+        assert len(books) <= free
+        assert set(books) <= set(instance.library_books(it))
+    scanned = [book for books in assigned for book in books]
+    assert len(scanned) == len(set(scanned))
+    assert sum(instance.scoring[book] for book in scanned) == brute_force(instance, order)
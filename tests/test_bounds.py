@@ -0,0 +1,13 @@
+from itertools import permutations
+from bounds import upper_bounds
+from common import Instance, score
+
+
+def test_bounds_with_zero_signup(tmp_path):
+    filename = tmp_path / 'instance.txt'
+    filename.write_text('4 3 5\n5 3 4 1\n2 0 1\n0 1\n2 2 1\n2 3\n1 6 1\n1\n')
+    instance = Instance(str(filename))
+    bound = upper_bounds(instance)['bound']
+    best = max(score([instance.libraries[it] for it in order], instance.days, verbose=False)
+               for order in permutations(range(instance.num_libraries)))
+    assert best <= bound
@@ -0,0 +1,15 @@
+import pickle
+from cache import load_instance
+from common import score
+from conftest import write_random_instance
+
+
+def test_cached_instance_pickles(tmp_path):
+    filename = str(tmp_path / 'instance.txt')
+    write_random_instance(filename, 0, books=40, libraries=10, days=20)
+    load_instance(filename)
+    instance = load_instance(filename)  # mapped from binary cache
+    copy = pickle.loads(pickle.dumps(instance))
+    for name in instance.arrays:
+        assert list(getattr(copy, name)) == list(getattr(instance, name))
+    assert score(copy.libraries, copy.days, verbose=False) == score(instance.libraries, instance.days, verbose=False)
@@ -0,0 +1,68 @@
+from random import Random
+import pytest
+from common import score
+from evaluator import Evaluator
+from vectorized import evaluate_batch, np, NumpyScorer
+
+SEEDS = range(20)
+
+
+def full_score(instance, order):
+    return score([instance.libraries[it] for it in order], instance.days, verbose=False)
+
+
+def random_orders(instance, rnd, count=8):
+    orders = []
+    for _ in range(count):
+        order = list(range(instance.num_libraries))
+        rnd.shuffle(order)
+        orders.append(order)
+    return orders
+
+
+@pytest.mark.skipif(np is None, reason='numpy is not installed')
+@pytest.mark.parametrize('seed', SEEDS)
+def test_numpy_engine_matches_score(random_instance, seed):
+    instance = random_instance(seed)
+    scorer = NumpyScorer(instance)
+    orders = random_orders(instance, Random(seed))
+    expected = [full_score(instance, order) for order in orders]
+    assert [scorer.score(order) for order in orders] == expected
+    scores, splits, chosen = evaluate_batch(instance, orders, scorer)
+    assert scores == expected
+    assert (scores, splits, chosen) == evaluate_batch(instance, orders)
+
+
+@pytest.mark.parametrize('days', [15, 60])  # long horizon lets evaluation stop early once back in sync
+@pytest.mark.parametrize('seed', SEEDS)
+def test_evaluator_moves_match_full_rescoring(random_instance, seed, days):
+    instance = random_instance(seed, books=60, libraries=20, days=days)
+    rnd = Random(seed)
+    n = instance.num_libraries
+    evaluator = Evaluator(instance.libraries, instance.days, random_orders(instance, rnd, 1)[0])
+    assert evaluator.score == full_score(instance, evaluator.order)
+    for _ in range(200):
+        kind = rnd.choice(('swap', 'move', 'insert', 'remove'))
+        order = list(evaluator.order)
+        if kind == 'swap':
+            a, b = rnd.randrange(len(order)), rnd.randrange(len(order))
+            order[a], order[b] = order[b], order[a]
+            assert evaluator.evaluate_swap(a, b) == full_score(instance, order)
+            evaluator.swap(a, b)
+        elif kind == 'move':
+            src, dst = rnd.randrange(len(order)), rnd.randrange(len(order))
+            order.insert(dst, order.pop(src))
+            assert evaluator.evaluate_move(src, dst) == full_score(instance, order)
+            evaluator.move(src, dst)
+        elif kind == 'insert' and len(order) < n:
+            pos, it = rnd.randrange(len(order) + 1), rnd.choice([it for it in range(n) if it not in order])
+            order.insert(pos, it)
+            assert evaluator.evaluate_insert(pos, it) == full_score(instance, order)
+            evaluator.insert(pos, it)
+        elif kind == 'remove' and len(order) > 1:
+            pos = rnd.randrange(len(order))
+            order.pop(pos)
+            assert evaluator.evaluate_remove(pos) == full_score(instance, order)
+            evaluator.remove(pos)
+        assert list(evaluator.order) == order
+        assert evaluator.score == full_score(instance, order)
@@ -0,0 +1,130 @@
+from typing import List, Dict, Any
+from array import array
+from itertools import islice
+import argparse
+from common import Instance, iter_ints, open_result
+from cache import load_instance
+
+
+def validate(instance: Instance, filename: str, max_errors: int = 10) -> Dict[str, Any]:
+    """
+    Check result file against instance and compute official score in single streamed pass.
+    Errors make submission invalid (wrong counts, unknown or duplicate library, book not owned by library,
+    duplicate book in library), wasted work is only counted (libraries signed up too late,
+    books beyond capacity of library, books already scanned by other library).
+    :param max_errors: number of error messages kept, all errors are counted
+    :return: dict with score, counts and error messages, result is valid if `errors` count is 0
+    """
+    report = {'score': 0, 'libraries': 0, 'books': 0, 'errors': 0, 'messages': [], 'late_libraries': 0,
+              'over_capacity': 0, 'duplicate_books': 0}
+
+    def error(message: str):
+        report['errors'] += 1
+        if len(report['messages']) < max_errors:
+            report['messages'].append(message)
+
+    scanned = bytearray(instance.num_books)
+    used = bytearray(instance.num_libraries)
+    owner = array('i', bytes(4 * instance.num_books))  # library id + 1 of the last library stamping its books
+    start = 0
+    sc = 0
+    with open_result(filename) as f:
+        tokens = iter_ints(f)
+        try:
+            count = next(tokens, None)
+            if count is None:
+                error('empty file')
+                return report
+            if count < 0:
+                error('negative number of libraries {}'.format(count))
+                return report
+            for block in range(count):
+                header = list(islice(tokens, 2))
+                if len(header) < 2:
+                    error('expected {} libraries, found {}'.format(count, block))
+                    break
+                lib, k = header
+                if k < 0:
+                    error('library {} lists negative number of books {}'.format(lib, k))
+                    break
+                books = list(islice(tokens, k))
+                if len(books) < k:
+                    error('library {} lists {} books, found {}'.format(lib, k, len(books)))
+                    break
+                if not 0 <= lib < instance.num_libraries:
+                    error('unknown library {}'.format(lib))
+                    continue
+                if used[lib]:
+                    error('duplicate library {}'.format(lib))
+                    continue
+                used[lib] = 1
+                if k < 1:
+                    error('library {} has no books'.format(lib))
+                report['libraries'] += 1
+                report['books'] += k
+                for book in instance.library_books(lib):
+                    owner[book] = lib + 1
+                start += instance.signup[lib]
+                capacity = max(0, instance.days - start) * instance.per_day[lib]
+                if capacity == 0:
+                    report['late_libraries'] += 1
+                for it, book in enumerate(books):
+                    if 0 <= book < instance.num_books and owner[book] == -(lib + 1):
+                        error('book {} listed twice by library {}'.format(book, lib))
+                        continue
+                    if not 0 <= book < instance.num_books or owner[book] != lib + 1:
+                        error('book {} is not in library {}'.format(book, lib))
+                        continue
+                    owner[book] = -(lib + 1)  # already listed by this library
+                    if it >= capacity:
+                        report['over_capacity'] += 1
+                    elif scanned[book]:
+                        report['duplicate_books'] += 1
+                    else:
+                        scanned[book] = 1
+                        sc += instance.scoring[book]
+            else:
+                if next(tokens, None) is not None:
+                    error('unexpected data after {} libraries'.format(count))
+        except ValueError as e:  # token is not an integer
+            error('malformed file: {}'.format(e))
+    report['score'] = sc
+    return report
+
+
+def print_report(filename: str, report: Dict[str, Any]):
+    print(filename, report['score'], 'valid' if not report['errors'] else 'INVALID ({} errors)'.format(report['errors']),
+          sep='\t')
+    for message in report['messages']:
+        print('\t' + message)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Validate and rescore result files")
+    parser.add_argument('instance', type=str, choices=['a', 'b', 'c', 'd', 'e', 'f'],
+        help='Select instance of results')
+    parser.add_argument('results', type=str, nargs='+',
+        help='Result files (gzip files with .gz extension)')
+    parser.add_argument('-v', '--verbose', action='store_true',
+        help='Print counts of wasted work')
+    args = parser.parse_args()
+
+    index = ord(args.instance) - ord('a')
+
+    files = ['a_example.txt',
+             'b_read_on.txt',
+             'c_incunabula.txt',
+             'd_tough_choices.txt',
+             'e_so_many_books.txt',
+             'f_libraries_of_the_world.txt']
+    file = files[index]
+
+    i = load_instance('input/' + file)
+    reports: List[Any] = [(filename, validate(i, filename)) for filename in args.results]
+    reports.sort(key=lambda x: (not x[1]['errors'], x[1]['score']), reverse=True)
+    for filename, report in reports:
+        print_report(filename, report)
+        if args.verbose:
+            print('\tlibraries:', report['libraries'], 'books:', report['books'],
+                  'late libraries:', report['late_libraries'], 'over capacity:', report['over_capacity'],
+                  'duplicate books:', report['duplicate_books'])
@@ -0,0 +1,133 @@
+from typing import Sequence, Tuple, List
+from common import Instance
+from evaluator import Evaluator
+try:
+    import numpy as np
+except ImportError:  # numpy engine is optional
+    np = None
+
+
+class NumpyScorer:
+    """
+    NumPy scoring engine, gives the same results as common.score
+    book claims are resolved with masks over the flat book array of instance
+    """
+
+    def __init__(self, instance: Instance):
+        if np is None:
+            raise ImportError('numpy is required for numpy scoring engine')
+        self.days = instance.days
+        self.num_books = instance.num_books
+        self.scoring = np.asarray(memoryview(instance.scoring)).astype(np.int64)
+        self.signup = np.asarray(memoryview(instance.signup))
+        self.per_day = np.asarray(memoryview(instance.per_day)).astype(np.int64)
+        self.offsets = np.asarray(memoryview(instance.offsets))
+        self.books = np.asarray(memoryview(instance.books))
+
+    def evaluate(self, order: Sequence[int]) -> Tuple[int, int, 'np.ndarray']:
+        """
+        :param order: library indices
+        :return: score, split (position after last library with books) and number of books chosen at each position
+        """
+        order = np.asarray(order, dtype=np.intp)
+        signup = self.signup[order]
+        per_day = self.per_day[order]
+        lo = self.offsets[order]
+        hi = self.offsets[order + 1]
+        chosen = np.zeros(len(order), dtype=np.int64)
+        scanned = np.zeros(self.num_books, dtype=bool)
+        sc = 0
+        split = 0
+        start = 0
+        j = 0
+        while j < len(order) and start < self.days:
+            # next library able to sign up before the end, libraries in between have no capacity at this start
+            window = 64
+            fits = np.flatnonzero(signup[j:j + window] < self.days - start)
+            while not fits.size and j + window < len(order):
+                window *= 4
+                fits = np.flatnonzero(signup[j:j + window] < self.days - start)
+            if not fits.size:
+                break
+            j += fits[0]
+            capacity = (self.days - start - signup[j]) * per_day[j]
+            books = self.books[lo[j]:hi[j]]
+            books = books[~scanned[books]][:capacity]
+            if books.size:
+                scanned[books] = True
+                sc += int(self.scoring[books].sum())
+                chosen[j] = books.size
+                split = j + 1
+                start += int(signup[j])
+            j += 1
+        return sc, split, chosen
+
+    def score(self, order: Sequence[int]) -> int:
+        return self.evaluate(order)[0]
+
+    def evaluate_batch(self, orders: Sequence[Sequence[int]]) -> Tuple['np.ndarray', 'np.ndarray', 'np.ndarray']:
+        """
+        evaluate many orderings of the same length at once, all of them are simulated in lockstep position by position
+        :param orders: 2-D array, population x libraries
+        :return: scores, splits and number of books chosen at each position (population x libraries)
+        """
+        orders = np.asarray(orders, dtype=np.intp).reshape(len(orders), -1)
+        size, length = orders.shape
+        starts = np.zeros(size, dtype=np.int64)
+        scores = np.zeros(size, dtype=np.int64)
+        splits = np.zeros(size, dtype=np.int64)
+        chosen = np.zeros((size, length), dtype=np.int64)
+        scanned = np.zeros((size, self.num_books), dtype=bool)
+        min_signup = self.signup.min() if len(self.signup) else 0
+        for j in range(length):
+            active = np.flatnonzero(starts + min_signup < self.days)
+            if not active.size:
+                break
+            libs = orders[active, j]
+            capacities = np.maximum(0, self.days - starts[active] - self.signup[libs]) * self.per_day[libs]
+            fit = capacities > 0
+            active, libs, capacities = active[fit], libs[fit], capacities[fit]
+            lo = self.offsets[libs]
+            lengths = self.offsets[libs + 1] - lo
+            total = int(lengths.sum())
+            if not total:
+                continue
+            # flatten books of all chosen libraries, seg is the index of library segment of every book
+            seg = np.repeat(np.arange(len(active)), lengths)
+            seg_start = np.cumsum(lengths) - lengths
+            books = self.books[np.arange(total) - np.repeat(seg_start - lo, lengths)]
+            free = ~scanned[active[seg], books]
+            # rank of free book in its segment, the first `capacity` free books are taken
+            free_before = np.concatenate(([0], np.cumsum(free)))
+            rank = free_before[1:] - np.repeat(free_before[seg_start], lengths)
+            take = free & (rank <= capacities[seg])
+            seg, books = seg[take], books[take]
+            scanned[active[seg], books] = True
+            counts = np.bincount(seg, minlength=len(active))
+            gains = np.bincount(seg, weights=self.scoring[books], minlength=len(active)).astype(np.int64)
+            got = counts > 0
+            rows = active[got]
+            scores[rows] += gains[got]
+            chosen[rows, j] = counts[got]
+            splits[rows] = j + 1
+            starts[rows] += self.signup[libs[got]]
+        return scores, splits, chosen
+
+
+def evaluate_batch(instance: Instance, orders: Sequence[Sequence[int]], scorer: NumpyScorer = None) \
+        -> Tuple[List[int], List[int], List[List[int]]]:
+    """
+    evaluate many orderings in one call, vectorized if numpy scorer is given
+    :param orders: 2-D array, population x libraries
+    :return: scores, splits and number of books chosen at each position of every ordering
+    """
+    if scorer is not None:
+        scores, splits, chosen = scorer.evaluate_batch(orders)
+        return scores.tolist(), splits.tolist(), chosen.tolist()
+    scores, splits, chosen = [], [], []
+    for order in orders:
+        evaluator = Evaluator(instance.libraries, instance.days, order)
+        scores.append(evaluator.score)
+        splits.append(evaluator.split)
+        chosen.append(evaluator.chosen_counts())
+    return scores, splits, chosen